@@ -0,0 +1,131 @@
+# backtest.py
+# Replay a fixtures file matchday by matchday and score the Poisson predictor
+# against what actually happened. Form only ever includes earlier matches.
+#
+#   python backtest.py ../data/2023_epl_fixtures.json --skip-matchdays 3
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import match_store
+from calculate_form import apply_results
+from poisson_model import predict_matches
+
+DATA_FILE = '../data/2023_epl_fixtures.json'
+CALIBRATION_BINS = 10
+EPS = 1e-15
+
+
+def outcome_codes(home_goals, away_goals):
+    """0=Home Win, 1=Draw, 2=Away Win"""
+    return np.where(home_goals > away_goals, 0, np.where(home_goals < away_goals, 2, 1))
+
+
+# ====================
+# Replay
+# ====================
+def replay(df, skip_matchdays=0):
+    """
+    Predict each matchday in one batch from the form of all earlier matches,
+    then fold that matchday's results into the form. Returns (probs, predicted,
+    actual, elapsed) for matches from matchday `skip_matchdays` on.
+    """
+    matchdays = match_store.matchday_index(df['date'])
+    rows = df.to_dict('records')
+    form, applied = {}, set()
+    probs, predicted, actual = [], [], []
+
+    start = time.perf_counter()
+    for md in np.unique(matchdays):
+        idx = np.flatnonzero(matchdays == md)
+        games = [rows[i] for i in idx]
+        if md >= skip_matchdays:
+            r = predict_matches([g['home_team'] for g in games], [g['away_team'] for g in games], form)
+            probs.append(np.column_stack([r['p_home_win'], r['p_draw'], r['p_away_win']]))
+            # The shipped prediction follows the most likely score, not the highest outcome probability
+            predicted.append(outcome_codes(r['best_home'], r['best_away']))
+            actual.append(outcome_codes(df['home_goals'].to_numpy()[idx], df['away_goals'].to_numpy()[idx]))
+        apply_results(form, applied, games)
+    elapsed = time.perf_counter() - start
+
+    if not probs:
+        return np.empty((0, 3)), np.empty(0, dtype=int), np.empty(0, dtype=int), elapsed
+    return np.concatenate(probs), np.concatenate(predicted), np.concatenate(actual), elapsed
+
+
+# ====================
+# Metrics
+# ====================
+def calibration_table(probs, actual, bins=CALIBRATION_BINS):
+    """One-vs-rest calibration pooled over all three outcomes, in equal-width probability bins"""
+    p = probs.ravel()
+    hit = (actual[:, None] == np.arange(3)).ravel()
+    which = np.minimum((p * bins).astype(int), bins - 1)
+
+    table = []
+    for b in range(bins):
+        mask = which == b
+        if mask.any():
+            table.append({
+                'bin': f"{b / bins:.1f}-{(b + 1) / bins:.1f}",
+                'count': int(mask.sum()),
+                'mean_predicted': float(p[mask].mean()),
+                'observed': float(hit[mask].mean())
+            })
+    return table
+
+
+def score(probs, predicted, actual):
+    """Accuracy, log-loss and Brier score (probabilities renormalized over the truncated score grid)"""
+    probs = probs / probs.sum(axis=1, keepdims=True)
+    onehot = (actual[:, None] == np.arange(3)).astype(float)
+    n = len(actual)
+    return {
+        'matches': n,
+        'accuracy': float((predicted == actual).mean()),
+        'argmax_accuracy': float((probs.argmax(axis=1) == actual).mean()),
+        'log_loss': float(-np.log(np.clip(probs[np.arange(n), actual], EPS, 1)).mean()),
+        'brier': float(((probs - onehot) ** 2).sum(axis=1).mean()),
+        'calibration': calibration_table(probs, actual)
+    }
+
+
+def backtest(path=DATA_FILE, skip_matchdays=0):
+    df = match_store.load_match_data(path)
+    if df.empty:
+        return None
+
+    probs, predicted, actual, elapsed = replay(df, skip_matchdays)
+    if not len(actual):
+        print("❌ No matches left to score")
+        return None
+
+    report = score(probs, predicted, actual)
+    report['seconds'] = elapsed
+    report['matches_per_second'] = len(df) / elapsed
+
+    print(f"\n📊 Backtest over {report['matches']} matches ({len(df)} replayed)")
+    print(f"🎯 Accuracy: {report['accuracy']:.3f} (argmax of probabilities: {report['argmax_accuracy']:.3f})")
+    print(f"📉 Log-loss: {report['log_loss']:.4f} | Brier: {report['brier']:.4f}")
+    print("\n📐 Calibration (predicted vs observed):")
+    for row in report['calibration']:
+        print(f"  {row['bin']}: {row['count']:5d}  {row['mean_predicted']:.3f} -> {row['observed']:.3f}")
+    print(f"\n⏱️ {elapsed * 1000:.1f} ms ({report['matches_per_second']:.0f} matches/s)")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a fixtures file and score the Poisson predictor")
+    parser.add_argument('path', nargs='?', default=DATA_FILE)
+    parser.add_argument('--skip-matchdays', type=int, default=0, help="Replay but don't score the first N matchdays (cold form)")
+    parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = backtest(args.path, args.skip_matchdays)
+    if report and args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.json}")
@@ -0,0 +1,216 @@
+# benchmark.py
+# Reproducible benchmarks for the data pipeline on synthetic fixtures, with
+# uploads going to the local PostgREST stub (never to Supabase).
+#
+#   python benchmark.py --leagues 20 --seasons 10 --out bench.json
+#   python benchmark.py --compare bench.json      # flag regressions against a previous run
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import calculate_form
+import fixture_loader
+import match_store
+import synth_fixtures
+from log_config import configure
+from postgrest_stub import Store, scheduled_fixtures, start_stub
+
+BENCH_DIR = '../data/cache/bench'
+# A benchmark this much slower than the --compare baseline is reported as a regression
+REGRESSION_RATIO = 1.25
+
+
+def timed(fn, repeat=3, items=None, setup=None):
+    """
+    Best and mean wall time of `fn()` over `repeat` runs (its output
+    silenced), each after an untimed `setup()`; returns (result, stats)
+    """
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+    stats = {'seconds': min(times), 'mean_seconds': sum(times) / len(times), 'repeat': repeat}
+    if items:
+        stats['items'] = items
+        stats['items_per_second'] = items / min(times)
+    return result, stats
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def import_predict_upcoming(stub_url):
+    """Import predict_upcoming with its Supabase config pointed at the stub"""
+    os.environ['SUPABASE_URL'] = stub_url
+    os.environ['SUPABASE_ANON_KEY'] = 'benchmark'
+    os.environ.setdefault('FOOTBALL_DATA_API_KEY', 'benchmark')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import predict_upcoming
+    return predict_upcoming
+
+
+# ====================
+# Startup (each run in a fresh interpreter, so nothing is already imported)
+# ====================
+STARTUP_SNIPPETS = {
+    'startup_import_predict_upcoming': "import predict_upcoming",
+    'startup_model_load_pickle': "import joblib; joblib.load('model.pkl')",
+    'startup_model_load_flat': "from tree_model import FlatForest; FlatForest.load('model.npz')"
+}
+
+
+def startup_time(snippet, repeat=3):
+    """Best and mean wall time of `snippet` (imports included) in `repeat` fresh interpreters"""
+    code = ("import time, warnings; warnings.simplefilter('ignore'); start = time.perf_counter()\n"
+            f"{snippet}\nprint(time.perf_counter() - start)")
+    env = dict(os.environ, SUPABASE_URL=os.getenv('SUPABASE_URL', 'http://127.0.0.1:1'),
+               SUPABASE_ANON_KEY=os.getenv('SUPABASE_ANON_KEY', 'benchmark'),
+               FOOTBALL_DATA_API_KEY=os.getenv('FOOTBALL_DATA_API_KEY', 'benchmark'), LOG_LEVEL='WARNING')
+    times = [float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                  env=env, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()[-1])
+             for _ in range(repeat)]
+    return {'seconds': min(times), 'mean_seconds': sum(times) / len(times), 'repeat': repeat}
+
+
+def run_startup(repeat=3):
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, snippet in STARTUP_SNIPPETS.items():
+        needs = 'model.pkl' if 'pickle' in name else 'model.npz' if 'flat' in name else None
+        if needs and not os.path.exists(os.path.join(here, needs)):
+            print(f"⚠️ Skipping {name}: {needs} not found")
+            continue
+        results[name] = startup_time(snippet, repeat)
+    return results
+
+
+# ====================
+# Suite
+# ====================
+def run_suite(leagues=1, seasons=1, repeat=3, latency_ms=0.0):
+    results = run_startup(repeat)
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"synth_{leagues}x{seasons}.json")
+
+    _, results['generate_fixtures'] = timed(lambda: synth_fixtures.write_fixtures(path, leagues, seasons), repeat=1)
+    print(f"🏗️ Synthetic fixtures: {path}")
+
+    df, results['load_match_data'] = timed(lambda: fixture_loader.load_match_data(path), repeat)
+    n = len(df)
+    results['load_match_data']['items'] = n
+    results['load_match_data']['items_per_second'] = n / results['load_match_data']['seconds']
+    match_store.open_store(path)  # build once so the next timing is the warm mmap path
+    _, results['load_match_data_store'] = timed(lambda: match_store.load_match_data(path), repeat, n)
+
+    _, results['calculate_team_form'] = timed(lambda: calculate_form.calculate_team_form(df), repeat, n)
+
+    import train_model
+    _, results['create_feature_dataset'] = timed(lambda: train_model.create_feature_dataset(df), repeat, n)
+    _, results['calculate_elo_ratings'] = timed(lambda: train_model.calculate_elo_ratings(df), repeat, n)
+
+    # Prediction and upload on one synthetic season of upcoming fixtures
+    server, stub_url = start_stub(latency_ms=latency_ms, store=Store())
+    try:
+        pu = import_predict_upcoming(stub_url)
+        team_form = pu.team_forms[pu.DEFAULT_COMPETITION] = calculate_form.calculate_team_form(df)
+        teams = list(team_form)[:synth_fixtures.TEAMS_PER_LEAGUE]
+        matches = [{'date': m['utcDate'], 'home_team': m['homeTeam']['name'], 'away_team': m['awayTeam']['name'],
+                    'league': m['competition']['name']} for m in scheduled_fixtures(teams)['matches']]
+        k = len(matches)
+
+        _, results['predict_match'] = timed(
+            lambda: [pu.predict_match(m['home_team'], m['away_team']) for m in matches], repeat, k)
+        predictions, results['predict_fixtures'] = timed(lambda: pu.predict_fixtures(matches), repeat, k)
+
+        # Every upload run starts from an empty table (all rows created); upload_bulk_update then rewrites them
+        def empty_store():
+            server.RequestHandlerClass.store = Store()
+
+        items = [(m, *p) for m, p in zip(matches, predictions)]
+        _, results['upload_serial'] = timed(lambda: pu.run_serial(matches, predictions), 1, k, setup=empty_store)
+        _, results['upload_bulk'] = timed(lambda: pu.upload_predictions_bulk(items), repeat, k, setup=empty_store)
+        _, results['upload_bulk_update'] = timed(lambda: pu.upload_predictions_bulk(items), repeat, k)
+    finally:
+        server.shutdown()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'leagues': leagues,
+            'seasons': seasons,
+            'matches': n,
+            'stub_latency_ms': latency_ms
+        },
+        'results': results
+    }
+
+
+def print_results(report, baseline=None):
+    print(f"\n📊 Benchmarks ({report['meta']['matches']} matches, commit {report['meta']['commit']})")
+    regressions = []
+    for name, r in report['results'].items():
+        rate = f"{r['items_per_second']:>12,.0f} items/s" if 'items_per_second' in r else ' ' * 20
+        line = f"  {name:<32} {r['seconds'] * 1000:>10.1f} ms {rate}"
+        old = (baseline or {}).get('results', {}).get(name)
+        if old:
+            ratio = r['seconds'] / old['seconds']
+            flag = '⚠️' if ratio > REGRESSION_RATIO else '  '
+            line += f"  {flag} {ratio:.2f}x vs baseline"
+            if ratio > REGRESSION_RATIO:
+                regressions.append(name)
+        print(line)
+    if regressions:
+        print(f"⚠️ Slower than baseline by more than {REGRESSION_RATIO}x: {', '.join(regressions)}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic fixtures")
+    parser.add_argument('--leagues', type=int, default=1)
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark (best time is reported)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Delay the stub adds to every request")
+    parser.add_argument('--out', default='benchmark_results.json', help="Where to write the JSON results")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    configure(level='WARNING')  # keep pipeline log lines out of the timings
+    report = run_suite(args.leagues, args.seasons, args.repeat, args.latency_ms)
+    regressions = print_results(report, baseline)
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {args.out}")
+    if regressions:
+        exit(1)
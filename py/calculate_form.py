@@ -1,117 +1,165 @@
 # calculate_form.py
+import argparse
 import json
+import os
+
+import numpy as np
 import pandas as pd
 
-DATA_FILE = '../data/2023_epl_fixtures.json'
-FORM_FILE = '../data/team_form_2023.json'
+import match_store
+from competitions import DEFAULT_COMPETITION, artifact_path, competition_code
+from elo import match_key
+from log_config import get_logger
 
-def load_match_data():
-    """Load and parse match data"""
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-        start = content.find('{')
-        end = content.rfind('}') + 1
-        if start == -1 or end == 0:
-            print("❌ No valid JSON found")
-            return pd.DataFrame()
-        data = json.loads(content[start:end])
-    except Exception as e:
-        print(f"❌ Error loading JSON: {e}")
-        return pd.DataFrame()
-
-    if 'response' not in data:
-        return pd.DataFrame()
-
-    matches = []
-    for fixture in data['response']:
-        status = fixture.get('fixture', {}).get('status', {}).get('long')
-        if status != "Match Finished":
-            continue
-        goals = fixture.get('goals', {})
-        home_goals = goals.get('home')
-        away_goals = goals.get('away')
-        if home_goals is None or away_goals is None:
-            continue
+DATA_FILE = artifact_path(DEFAULT_COMPETITION, 'fixtures')
+FORM_FILE = artifact_path(DEFAULT_COMPETITION, 'form')
+# Identities of the matches already counted in FORM_FILE
+FORM_STATE_FILE = artifact_path(DEFAULT_COMPETITION, 'form_state')
 
-        matches.append({
-            'date': fixture['fixture']['date'],
-            'home_team': fixture['teams']['home']['name'],
-            'away_team': fixture['teams']['away']['name'],
-            'home_goals': home_goals,
-            'away_goals': away_goals
-        })
+log = get_logger('form')
 
-    df = pd.DataFrame(matches)
-    if df.empty:
-        return df
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date').reset_index(drop=True)
-    print(f"✅ Loaded {len(df)} finished matches")
-    return df
+COUNT_KEYS = ['wins', 'draws', 'losses', 'goals_scored', 'goals_conceded']
+
+def load_match_data(path=None):
+    """Load finished matches from DATA_FILE (or `path`) via the cached match store"""
+    return match_store.load_match_data(path or DATA_FILE)
+
+def add_rates(team_form):
+    """(Re)compute rates and averages from a team's counts"""
+    n = team_form['wins'] + team_form['draws'] + team_form['losses']
+    if n > 0:
+        team_form['win_rate'] = team_form['wins'] / n
+        team_form['draw_rate'] = team_form['draws'] / n
+        team_form['loss_rate'] = team_form['losses'] / n
+        team_form['goals_per_game'] = team_form['goals_scored'] / n
+        team_form['goals_conceded_per_game'] = team_form['goals_conceded'] / n
+    else:
+        team_form['win_rate'] = 0.0
+        team_form['draw_rate'] = 0.0
+        team_form['loss_rate'] = 0.0
+        team_form['goals_per_game'] = 0.0
+        team_form['goals_conceded_per_game'] = 0.0
+    return team_form
 
 def calculate_team_form(df):
-    """Calculate form with goals per game"""
-    form = {}
+    """Calculate form with goals per game (one groupby over home and away perspectives)"""
+    if df.empty:
+        return {}
+
+    home_goals = df['home_goals'].to_numpy()
+    away_goals = df['away_goals'].to_numpy()
 
-    for _, match in df.iterrows():
-        home_team = match['home_team']
-        away_team = match['away_team']
-
-        # Initialize
-        if home_team not in form:
-            form[home_team] = {
-                'wins': 0, 'draws': 0, 'losses': 0,
-                'goals_scored': 0, 'goals_conceded': 0
-            }
-        if away_team not in form:
-            form[away_team] = {
-                'wins': 0, 'draws': 0, 'losses': 0,
-                'goals_scored': 0, 'goals_conceded': 0
-            }
-
-        # Update results
-        if match['home_goals'] > match['away_goals']:
-            form[home_team]['wins'] += 1
-            form[away_team]['losses'] += 1
-        elif match['home_goals'] < match['away_goals']:
-            form[home_team]['losses'] += 1
-            form[away_team]['wins'] += 1
-        else:
-            form[home_team]['draws'] += 1
-            form[away_team]['draws'] += 1
-
-        # Update goals
-        form[home_team]['goals_scored'] += match['home_goals']
-        form[home_team]['goals_conceded'] += match['away_goals']
-        form[away_team]['goals_scored'] += match['away_goals']
-        form[away_team]['goals_conceded'] += match['home_goals']
-
-    # Add rates and averages
-    for team in form:
-        n = form[team]['wins'] + form[team]['draws'] + form[team]['losses']
-        if n > 0:
-            form[team]['win_rate'] = form[team]['wins'] / n
-            form[team]['draw_rate'] = form[team]['draws'] / n
-            form[team]['loss_rate'] = form[team]['losses'] / n
-            form[team]['goals_per_game'] = form[team]['goals_scored'] / n
-            form[team]['goals_conceded_per_game'] = form[team]['goals_conceded'] / n
-        else:
-            form[team]['win_rate'] = 0.0
-            form[team]['draw_rate'] = 0.0
-            form[team]['loss_rate'] = 0.0
-            form[team]['goals_per_game'] = 0.0
-            form[team]['goals_conceded_per_game'] = 0.0
+    # One row per team per match, interleaved home/away so teams keep first-seen order
+    scored = np.column_stack([home_goals, away_goals]).ravel()
+    conceded = np.column_stack([away_goals, home_goals]).ravel()
+    perspectives = pd.DataFrame({
+        'team': np.column_stack([df['home_team'].to_numpy(), df['away_team'].to_numpy()]).ravel(),
+        'wins': scored > conceded,
+        'draws': scored == conceded,
+        'losses': scored < conceded,
+        'goals_scored': scored,
+        'goals_conceded': conceded
+    })
+    totals = perspectives.groupby('team', sort=False)[COUNT_KEYS].sum()
 
+    form = {}
+    for team, counts in zip(totals.index, totals.to_numpy().tolist()):
+        form[team] = add_rates(dict(zip(COUNT_KEYS, counts)))
     return form
 
-if __name__ == "__main__":
-    df = load_match_data()
+# ====================
+# Incremental Form State
+# ====================
+def load_form_state(form_file=None, state_file=None):
+    """Saved form and the set of match keys already counted in it"""
+    try:
+        with open(form_file or FORM_FILE, 'r') as f:
+            form = json.load(f)
+    except FileNotFoundError:
+        form = {}
+    try:
+        with open(state_file or FORM_STATE_FILE, 'r') as f:
+            applied = set(json.load(f)['applied'])
+    except FileNotFoundError:
+        applied = set()
+    return form, applied
+
+def save_form_state(form, applied, form_file=None, state_file=None):
+    form_file = form_file or FORM_FILE
+    os.makedirs(os.path.dirname(form_file) or '.', exist_ok=True)
+    with open(form_file, 'w') as f:
+        json.dump(form, f, indent=2)
+    with open(state_file or FORM_STATE_FILE, 'w') as f:
+        json.dump({'applied': sorted(applied)}, f)
+
+def apply_results(form, applied, results):
+    """
+    Add newly finished matches (dicts with date, home_team, away_team,
+    home_goals, away_goals) to `form` in place. Matches whose key is in
+    `applied` are skipped. Returns the number applied.
+    """
+    count = 0
+    for r in results:
+        key = match_key(r['date'], r['home_team'], r['away_team'])
+        if key in applied:
+            continue
+        applied.add(key)
+        count += 1
+
+        hg, ag = int(r['home_goals']), int(r['away_goals'])
+        for team, scored, conceded in ((r['home_team'], hg, ag), (r['away_team'], ag, hg)):
+            team_form = form.setdefault(team, {k: 0 for k in COUNT_KEYS})
+            if scored > conceded:
+                team_form['wins'] += 1
+            elif scored < conceded:
+                team_form['losses'] += 1
+            else:
+                team_form['draws'] += 1
+            team_form['goals_scored'] += scored
+            team_form['goals_conceded'] += conceded
+            add_rates(team_form)
+    return count
+
+def update_form_state(results, competition=DEFAULT_COMPETITION, state=None):
+    """
+    Apply new results to a competition's saved form files; O(new matches).
+    `state` is an already-loaded (form, applied) pair to update in place
+    instead of reading the files.
+    """
+    form_file = artifact_path(competition, 'form')
+    state_file = artifact_path(competition, 'form_state')
+    if state is None:
+        if not os.path.exists(state_file):
+            log.warning("⚠️ No form state at %s. Run 'python calculate_form.py --competition %s' first.", state_file, competition)
+            return 0
+        state = load_form_state(form_file, state_file)
+
+    form, applied = state
+    count = apply_results(form, applied, results)
+    if count:
+        save_form_state(form, applied, form_file, state_file)
+    log.info("📈 Applied %d new results to %s team form", count, competition,
+             extra={'data': {'stage': 'form', 'competition': competition, 'applied': count}})
+    return count
+
+def rebuild_form(competition=DEFAULT_COMPETITION, df=None):
+    """Recompute a competition's form from its whole fixture history and save it; returns (form, applied)"""
+    if df is None:
+        df = load_match_data(artifact_path(competition, 'fixtures'))
     if df.empty:
+        return None
+    form_file = artifact_path(competition, 'form')
+    form = calculate_team_form(df)
+    applied = {match_key(d, h, a) for d, h, a in zip(df['date'], df['home_team'], df['away_team'])}
+    save_form_state(form, applied, form_file, artifact_path(competition, 'form_state'))
+    log.info("✅ Saved team form to %s", form_file)
+    return form, applied
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild team form from a competition's fixture history")
+    parser.add_argument('--competition', type=competition_code, default=DEFAULT_COMPETITION)
+    args = parser.parse_args()
+
+    if rebuild_form(args.competition) is None:
         print("❌ No matches loaded")
         exit(1)
-
-    form = calculate_team_form(df)
-    with open(FORM_FILE, 'w') as f:
-        json.dump(form, f, indent=2)
-    print(f"✅ Saved team form to {FORM_FILE}")
\ No newline at end of file
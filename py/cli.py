@@ -0,0 +1,202 @@
+# cli.py
+# One entry point for the pipeline. Each subcommand imports only what it
+# needs and checks only the env vars it uses; run-all chains the stages in a
+# single process and hands loaded data from one stage to the next.
+#
+#   python cli.py fetch --competitions PL,BL1
+#   python cli.py form --competition PL
+#   python cli.py train --competition PL
+#   python cli.py predict --batch --model xgb
+#   python cli.py reconcile
+#   python cli.py run-all --batch [--rebuild]
+
+import argparse
+import json
+import os
+
+import config
+import metrics
+from competitions import (DEFAULT_COMPETITION, add_competitions_argument, artifact_path,
+                          competition_code, enabled_competitions, failed_competitions,
+                          run_concurrently)
+from log_config import add_log_level_argument, configure, get_logger
+
+log = get_logger('cli')
+
+# Env vars each subcommand needs, checked before any work starts
+REQUIRED_ENV = {
+    'fetch': ('FOOTBALL_DATA_API_KEY',),
+    'form': (),
+    'train': (),
+    'predict': ('FOOTBALL_DATA_API_KEY', 'SUPABASE_URL', 'SUPABASE_ANON_KEY'),
+    'reconcile': ('FOOTBALL_DATA_API_KEY', 'SUPABASE_URL', 'SUPABASE_ANON_KEY'),
+    'run-all': ('FOOTBALL_DATA_API_KEY', 'SUPABASE_URL', 'SUPABASE_ANON_KEY')
+}
+
+
+# ====================
+# Subcommands
+# ====================
+def cmd_fetch(args):
+    """Recent finished results from football-data.org (no Supabase needed)"""
+    import fetch_matches
+
+    results = run_concurrently(args.competitions or enabled_competitions(), fetch_matches.fetch_recent_results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        log.info("💾 Results saved to %s", args.out)
+    return results
+
+
+def cmd_form(args):
+    import calculate_form
+
+    if calculate_form.rebuild_form(args.competition) is None:
+        raise SystemExit("❌ No matches loaded")
+
+
+def cmd_train(args):
+    import train_model
+
+    train_model.use_competition(args.competition)
+    if train_model.train_model() is None:
+        raise SystemExit("❌ Training failed")
+
+
+def cmd_predict(args):
+    import predict_upcoming
+
+    return predict_upcoming.predict_all(args.competitions or enabled_competitions(), args)
+
+
+def cmd_reconcile(args):
+    import fetch_matches
+
+    return run_concurrently(args.competitions or enabled_competitions(), fetch_matches.process_competition)
+
+
+def rebuild(competition):
+    """
+    Recompute form and retrain from the fixture history (read once), then
+    hand the history, form and model to predict_upcoming's caches.
+    Returns the rebuilt (form, applied) form state.
+    """
+    import calculate_form
+    import match_store
+    import predict_upcoming
+    import train_model
+    from tree_model import FlatForest
+
+    df = match_store.load_match_data(artifact_path(competition, 'fixtures'))
+    if df.empty:
+        log.warning("⚠️ No fixture history for %s; keeping its saved form and model", competition)
+        return None
+    predict_upcoming.match_histories[competition] = df
+    form_state = calculate_form.rebuild_form(competition, df)
+
+    train_model.use_competition(competition)
+    model = train_model.train_model(df=df)
+    if model is not None:
+        predict_upcoming._models[competition] = FlatForest.from_booster(model.get_booster())
+    return form_state
+
+
+def cmd_run_all(args):
+    """fetch -> reconcile (folding results into ELO and form) -> predict, optionally after form + train"""
+    import calculate_form
+    import fetch_matches
+    import predict_upcoming
+
+    competitions = args.competitions or enabled_competitions()
+    # Training is CPU-bound and rebinds train_model's paths, so it runs one competition at a time
+    rebuilt = {c: rebuild(c) for c in competitions} if args.rebuild else {}
+
+    def reconcile(competition):
+        results = fetch_matches.fetch_recent_results(competition)
+
+        # Load ELO and form once; predict_upcoming then scores with the updated objects
+        engine = None
+        if os.path.exists(artifact_path(competition, 'elo')):
+            engine = predict_upcoming.get_elo_engine(competition)
+        form_state = rebuilt.get(competition)
+        if form_state is None and os.path.exists(artifact_path(competition, 'form_state')):
+            form_state = calculate_form.load_form_state(artifact_path(competition, 'form'),
+                                                        artifact_path(competition, 'form_state'))
+        stats = fetch_matches.process_competition(competition, results, engine, form_state)
+        if form_state is not None:
+            predict_upcoming.team_forms[competition] = form_state[0]
+        return stats
+
+    run_concurrently(competitions, reconcile)
+    return predict_upcoming.predict_all(competitions, args)
+
+
+COMMANDS = {
+    'fetch': cmd_fetch,
+    'form': cmd_form,
+    'train': cmd_train,
+    'predict': cmd_predict,
+    'reconcile': cmd_reconcile,
+    'run-all': cmd_run_all
+}
+
+
+# ====================
+# Main
+# ====================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Soccer prediction pipeline")
+    add_log_level_argument(parser)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('fetch', help="Fetch recent finished results")
+    add_competitions_argument(p)
+    p.add_argument('--out', help="Also write the results to this JSON file")
+
+    for name, text in (('form', "Rebuild team form from the fixture history"),
+                       ('train', "Train the XGBoost model and save the ELO state")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('--competition', type=competition_code, default=DEFAULT_COMPETITION)
+
+    import predict_upcoming  # light: heavy model code is imported on first use
+    p = sub.add_parser('predict', help="Predict upcoming fixtures and upload them to Supabase")
+    predict_upcoming.add_predict_arguments(p)
+    add_competitions_argument(p)
+
+    p = sub.add_parser('reconcile', help="Score stored predictions against recent results; update ELO and form")
+    add_competitions_argument(p)
+
+    p = sub.add_parser('run-all', help="reconcile then predict in one process (--rebuild: form and train first)")
+    predict_upcoming.add_predict_arguments(p)
+    add_competitions_argument(p)
+    p.add_argument('--rebuild', action='store_true', help="Recompute form and retrain before reconciling")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure(level=args.log_level)
+    try:
+        for name in REQUIRED_ENV[args.command]:
+            config.require(name)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    COMMANDS[args.command](args)
+
+    if args.command in ('fetch', 'predict', 'reconcile', 'run-all'):
+        from http_client import get_client
+        from teams import report_unresolved
+        get_client().report()
+        report_unresolved()
+    prom_path, json_path = metrics.write_run_metrics(args.command.replace('-', '_'))
+    log.info("📈 Metrics written to %s and %s", prom_path, json_path)
+
+    failed = failed_competitions()
+    if failed:
+        raise SystemExit(f"❌ Failed competitions: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
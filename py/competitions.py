@@ -0,0 +1,111 @@
+# competitions.py
+# football-data.org competitions the pipeline can serve, and where each one's
+# artifacts (fixture history, team form, ELO state, model) live.
+# PL keeps the original single-league file names.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from log_config import get_logger
+
+DEFAULT_COMPETITION = 'PL'
+
+log = get_logger('competitions')
+_failed = set()  # competitions whose run_concurrently call raised in this process
+
+# football-data.org code -> display name
+COMPETITIONS = {
+    'PL': 'Premier League',
+    'ELC': 'Championship',
+    'BL1': 'Bundesliga',
+    'SA': 'Serie A',
+    'PD': 'Primera Division',
+    'FL1': 'Ligue 1',
+    'DED': 'Eredivisie',
+    'PPL': 'Primeira Liga',
+    'CL': 'UEFA Champions League'
+}
+
+LEGACY_ARTIFACTS = {
+    'fixtures': '../data/2023_epl_fixtures.json',
+    'form': '../data/team_form_2023.json',
+    'form_state': '../data/team_form_state.json',
+    'elo': '../data/elo_state.npz',
+    'model': 'model.pkl',
+    'model_flat': 'model.npz'
+}
+
+
+def artifact_path(competition, kind):
+    """Path of one artifact ('fixtures', 'form', 'form_state', 'elo', 'model' or 'model_flat') for a competition"""
+    if competition == DEFAULT_COMPETITION:
+        return LEGACY_ARTIFACTS[kind]
+    if kind == 'model':
+        return f"model_{competition.lower()}.pkl"
+    if kind == 'model_flat':
+        return f"model_{competition.lower()}.npz"
+    base = f"../data/{competition.lower()}"
+    return {
+        'fixtures': f"{base}/fixtures.json",
+        'form': f"{base}/team_form.json",
+        'form_state': f"{base}/team_form_state.json",
+        'elo': f"{base}/elo_state.npz"
+    }[kind]
+
+
+def parse_competitions(value):
+    """'PL, bl1' -> ['PL', 'BL1']; raises ValueError for codes we don't know"""
+    codes = [c.strip().upper() for c in value.split(',') if c.strip()]
+    unknown = [c for c in codes if c not in COMPETITIONS]
+    if unknown:
+        raise ValueError(f"❌ Unknown competition(s): {', '.join(unknown)} (known: {', '.join(COMPETITIONS)})")
+    return list(dict.fromkeys(codes))
+
+
+def competition_code(value):
+    """One competition code (argparse type for --competition)"""
+    codes = parse_competitions(value)
+    if len(codes) != 1:
+        raise ValueError("❌ Expected exactly one competition")
+    return codes[0]
+
+
+def enabled_competitions():
+    """Competitions from the COMPETITIONS env var (comma-separated), default PL only"""
+    return parse_competitions(os.getenv("COMPETITIONS", DEFAULT_COMPETITION))
+
+
+def add_competitions_argument(parser):
+    parser.add_argument('--competitions', type=parse_competitions, default=None,
+                        help="Comma-separated football-data.org codes, e.g. PL,BL1 (default: COMPETITIONS or PL)")
+
+
+def run_concurrently(competitions, fn):
+    """
+    Run fn(competition) for every competition on its own thread and return
+    {competition: result}. Requests to football-data.org still share the
+    http_client token bucket, so the API quota holds however many run.
+    A competition that raises is logged and gets None as its result, so the
+    others still finish.
+    """
+    def run(code):
+        try:
+            return fn(code)
+        except Exception as e:
+            log.exception("❌ %s failed: %s", code, e,
+                          extra={'data': {'competition': code, 'error': type(e).__name__}})
+            metrics.inc('competition_failures_total', competition=code)
+            _failed.add(code)
+            return None
+
+    if len(competitions) == 1:
+        return {competitions[0]: run(competitions[0])}
+    with ThreadPoolExecutor(max_workers=len(competitions)) as pool:
+        futures = {code: pool.submit(run, code) for code in competitions}
+        return {code: future.result() for code, future in futures.items()}
+
+
+def failed_competitions():
+    """Competitions that failed in any run_concurrently call so far"""
+    return sorted(_failed)
@@ -0,0 +1,49 @@
+# config.py
+# Environment config for the pipeline. The project .env is loaded on import,
+# but required variables are only checked when something actually needs them,
+# so inspecting data or training never asks for Supabase keys.
+
+import os
+
+from dotenv import load_dotenv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_FILE = os.path.join(PROJECT_ROOT, '.env')
+
+# GitHub Actions passes secrets as environment variables; locally they come from .env
+IN_GITHUB_ACTIONS = os.getenv("GITHUB_ACTIONS") == "true"
+if not IN_GITHUB_ACTIONS and os.path.exists(ENV_FILE):
+    load_dotenv(ENV_FILE)
+
+# football-data.org API (override to point at a local stub)
+DEFAULT_FOOTBALL_DATA_URL = "https://api.football-data.org/v4"
+
+
+def require(name):
+    """Value of a required environment variable; raises ValueError when it is unset"""
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"❌ Missing {name} (set it in .env or GitHub Secrets)")
+    return value
+
+
+def football_data_url():
+    return os.getenv("FOOTBALL_DATA_URL", DEFAULT_FOOTBALL_DATA_URL)
+
+
+def football_data_headers():
+    return {"X-Auth-Token": require("FOOTBALL_DATA_API_KEY")}
+
+
+def supabase_rest_url():
+    return f"{require('SUPABASE_URL')}/rest/v1"
+
+
+def supabase_headers(**extra):
+    key = require("SUPABASE_ANON_KEY")
+    return {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json",
+        **extra
+    }
@@ -0,0 +1,160 @@
+# elo.py
+# Point-in-time ELO ratings with integer team IDs and NumPy state
+
+import os
+import numpy as np
+
+BASE_RATING = 1500
+K_FACTOR = 30
+
+
+def match_key(date, home_team, away_team):
+    """Identity of a match: 'YYYY-MM-DD|home|away'"""
+    if not isinstance(date, str):
+        date = date.strftime('%Y-%m-%d')
+    return f"{date[:10]}|{home_team}|{away_team}"
+
+
+# ====================
+# ELO Engine
+# ====================
+class EloEngine:
+    """Running ELO ratings that can be saved and updated incrementally"""
+
+    def __init__(self, k_factor=K_FACTOR, base_rating=BASE_RATING):
+        self.k_factor = k_factor
+        self.base_rating = base_rating
+        self.teams = []       # id -> name
+        self.team_ids = {}    # name -> id
+        self.ratings = np.empty(0)
+        self.applied = set()  # match_key() of every match already rated
+        self.version = 0      # bumped whenever ratings change, so lookups built from them can be cached
+
+    # --------------------
+    # Team IDs
+    # --------------------
+    def team_id(self, name):
+        """Integer ID of `name`, registering new teams at the base rating"""
+        tid = self.team_ids.get(name)
+        if tid is None:
+            tid = self.team_ids[name] = len(self.teams)
+            self.teams.append(name)
+            self.ratings = np.append(self.ratings, float(self.base_rating))
+        return tid
+
+    def ids(self, names):
+        return np.fromiter((self.team_id(n) for n in names), dtype=np.int32, count=len(names))
+
+    # --------------------
+    # Updates
+    # --------------------
+    def process(self, home_ids, away_ids, home_goals, away_goals):
+        """
+        Rate matches in order and return each side's pre-match rating.
+        Arrays must be date-sorted; this is the only sequential part.
+        """
+        n = len(home_ids)
+        pre_home = np.empty(n)
+        pre_away = np.empty(n)
+        elo = self.ratings.tolist()
+        k_factor = self.k_factor
+
+        for i in range(n):
+            h, a = home_ids[i], away_ids[i]
+            home_elo, away_elo = elo[h], elo[a]
+            pre_home[i], pre_away[i] = home_elo, away_elo
+
+            # Expected win probability
+            expected_home = 1 / (1 + 10 ** ((away_elo - home_elo) / 400))
+
+            # Actual result
+            if home_goals[i] > away_goals[i]:
+                result = 1.0
+            elif home_goals[i] < away_goals[i]:
+                result = 0.0
+            else:
+                result = 0.5
+
+            elo[h] = home_elo + k_factor * (result - expected_home)
+            elo[a] = away_elo + k_factor * ((1 - result) - (1 - expected_home))
+
+        self.ratings = np.array(elo)
+        self.version += 1
+        return pre_home, pre_away
+
+    def fit(self, df):
+        """Rate every match in a date-sorted DataFrame; returns pre-match ratings per row"""
+        home_ids = self.ids(df['home_team'].tolist())
+        away_ids = self.ids(df['away_team'].tolist())
+        pre_home, pre_away = self.process(
+            home_ids, away_ids,
+            df['home_goals'].to_numpy(), df['away_goals'].to_numpy()
+        )
+        self.applied.update(
+            match_key(d, h, a) for d, h, a in zip(df['date'], df['home_team'], df['away_team'])
+        )
+        return pre_home, pre_away
+
+    def apply_results(self, results):
+        """
+        Apply newly finished matches (dicts with date, home_team, away_team,
+        home_goals, away_goals) without replaying history. Matches already
+        rated are skipped. Returns the number applied.
+        """
+        new = []
+        for r in sorted(results, key=lambda r: r['date']):
+            key = match_key(r['date'], r['home_team'], r['away_team'])
+            if key in self.applied:
+                continue
+            self.applied.add(key)
+            new.append(r)
+
+        if new:
+            self.process(
+                self.ids([r['home_team'] for r in new]),
+                self.ids([r['away_team'] for r in new]),
+                [r['home_goals'] for r in new],
+                [r['away_goals'] for r in new]
+            )
+        return len(new)
+
+    # --------------------
+    # Lookups
+    # --------------------
+    def lookup(self, names):
+        """Current ratings for a batch of team names (base rating if unknown)"""
+        ids = np.fromiter((self.team_ids.get(n, -1) for n in names), dtype=np.int64, count=len(names))
+        known = ids >= 0
+        out = np.full(len(ids), float(self.base_rating))
+        out[known] = self.ratings[ids[known]]
+        return out
+
+    def as_dict(self):
+        return dict(zip(self.teams, self.ratings.tolist()))
+
+    # --------------------
+    # Persistence
+    # --------------------
+    def save(self, path):
+        np.savez(
+            path,
+            ratings=self.ratings,
+            teams=np.array(self.teams, dtype=str),
+            applied=np.array(sorted(self.applied), dtype=str),
+            params=np.array([self.k_factor, self.base_rating], dtype=float)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as state:
+            k_factor, base_rating = state['params'].tolist()
+            engine = cls(k_factor=k_factor, base_rating=base_rating)
+            engine.teams = state['teams'].tolist()
+            engine.team_ids = {name: i for i, name in enumerate(engine.teams)}
+            engine.ratings = state['ratings'].astype(float)
+            engine.applied = set(state['applied'].tolist())
+        return engine
+
+    @classmethod
+    def load_or_new(cls, path):
+        return cls.load(path) if os.path.exists(path) else cls()
@@ -0,0 +1,78 @@
+# feature_cache.py
+# On-disk cache of feature DataFrames keyed by source-data hash + feature config
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = '../data/cache/features'
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+# Columns of a match frame the features are computed from
+SOURCE_COLUMNS = ['date', 'home_team', 'away_team', 'home_goals', 'away_goals']
+
+
+def frame_hash(df):
+    """Content hash of a match DataFrame's rows (order matters, the index doesn't)"""
+    row_hashes = pd.util.hash_pandas_object(df[SOURCE_COLUMNS], index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def cache_key(source_hash, config):
+    """Stable key for a source file hash and a JSON-serializable feature config"""
+    payload = json.dumps({'source': source_hash, 'config': config}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def _path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+
+def load(key, cache_dir=CACHE_DIR):
+    """Cached DataFrame for `key`, or None on a miss"""
+    path = _path(key, cache_dir)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            columns = data['__columns__'].tolist()
+            df = pd.DataFrame({col: data[col] for col in columns}, columns=columns)
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        return None
+    os.utime(path)  # mark as recently used for eviction
+    return df
+
+
+def save(key, df, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Write `df` under `key`, then evict least recently used entries over `max_bytes`"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(key, cache_dir)
+    tmp = path + '.tmp.npz'
+    arrays = {col: df[col].to_numpy() for col in df.columns}
+    np.savez(tmp, __columns__=np.array(df.columns, dtype=str), **arrays)
+    os.replace(tmp, path)
+    return evict(cache_dir, max_bytes, keep=path)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, keep=None):
+    """Delete least recently used entries until the cache fits in `max_bytes`. Returns files removed"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+            path = os.path.join(cache_dir, name)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        total -= size
+        removed += 1
+    return removed
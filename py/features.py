@@ -0,0 +1,40 @@
+# features.py
+# Model feature matrix shared by training (train_model) and inference (predict_upcoming)
+
+import pandas as pd
+
+from form_engine import FORM_KEYS
+
+# Column order the XGBoost model is trained on
+FEATURE_COLUMNS = [
+    'home_win_rate', 'home_draw_rate', 'home_goals_per_game', 'home_goals_conceded_per_game',
+    'away_win_rate', 'away_draw_rate', 'away_goals_per_game', 'away_goals_conceded_per_game',
+    'elo_diff', 'home_advantage'
+]
+
+
+def feature_frame(home_form, away_form, elo_diff):
+    """
+    Build the feature DataFrame from (n, len(FORM_KEYS)) form arrays for each
+    side and an array of home-minus-away ELO differences.
+    """
+    col = {key: i for i, key in enumerate(FORM_KEYS)}
+    return pd.DataFrame({
+        # Home team form
+        'home_win_rate': home_form[:, col['win_rate']],
+        'home_draw_rate': home_form[:, col['draw_rate']],
+        'home_goals_per_game': home_form[:, col['goals_per_game']],
+        'home_goals_conceded_per_game': home_form[:, col['goals_conceded_per_game']],
+
+        # Away team form
+        'away_win_rate': away_form[:, col['win_rate']],
+        'away_draw_rate': away_form[:, col['draw_rate']],
+        'away_goals_per_game': away_form[:, col['goals_per_game']],
+        'away_goals_conceded_per_game': away_form[:, col['goals_conceded_per_game']],
+
+        # ELO difference
+        'elo_diff': elo_diff,
+
+        # Home advantage
+        'home_advantage': 1
+    }, columns=FEATURE_COLUMNS)
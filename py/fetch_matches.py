@@ -1,77 +1,35 @@
 # py/fetch_matches.py
-import requests
+import argparse
 from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
 from urllib.parse import quote
 
-# ====================
-# Load Environment Variables
-# ====================
-load_dotenv()
-
-API_KEY = os.getenv("FOOTBALL_DATA_API_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-
-# Validate config
-if not all([API_KEY, SUPABASE_URL, SUPABASE_KEY]):
-    raise ValueError("❌ Missing required environment variables in .env file")
-
-# Use the base URL
-SUPABASE_REST_URL = f"{SUPABASE_URL}/rest/v1"
-
-HEADERS = {"X-Auth-Token": API_KEY}
-SUPABASE_HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json"
-}
-
-def normalize_team_name(name):
-    """Convert full API team name to short name used in team_form_2023.json"""
-    mapping = {
-        "Arsenal FC": "Arsenal",
-        "Aston Villa FC": "Aston Villa",
-        "AFC Bournemouth": "Bournemouth",
-        "Brentford FC": "Brentford",
-        "Brighton & Hove Albion FC": "Brighton",
-        "Burnley FC": "Burnley",
-        "Chelsea FC": "Chelsea",
-        "Crystal Palace FC": "Crystal Palace",
-        "Everton FC": "Everton",
-        "Fulham FC": "Fulham",
-        "Leeds United FC": "Leeds United",
-        "Leicester City FC": "Leicester",
-        "Liverpool FC": "Liverpool",
-        "Luton Town FC": "Luton",
-        "Manchester City FC": "Manchester City",
-        "Manchester United FC": "Manchester United",
-        "Newcastle United FC": "Newcastle",
-        "Nottingham Forest FC": "Nottingham Forest",
-        "Sheffield United FC": "Sheffield Utd",
-        "Southampton FC": "Southampton",
-        "Tottenham Hotspur FC": "Tottenham",
-        "West Ham United FC": "West Ham",
-        "Wolverhampton Wanderers FC": "Wolves",
-        "Sunderland AFC": "Sunderland"
-    }
-    return mapping.get(name, name)
+import config
+import metrics
+from competitions import (DEFAULT_COMPETITION, add_competitions_argument, artifact_path,
+                          enabled_competitions, run_concurrently)
+from http_client import DEFAULT_TIMEOUT, get_client
+from log_config import add_log_level_argument, configure, get_logger
+from supabase_rest import UPSERT_CHUNK_SIZE, chunked, in_filter, select_rows, upsert_rows
+from teams import normalize_team_name, report_unresolved
+
+log = get_logger('fetch')
 
 # ====================
 # Fetch Recent Match Results
 # ====================
-def fetch_recent_results():
+@metrics.stage('fetch')
+def fetch_recent_results(competition=DEFAULT_COMPETITION):
     # Get matches from last 7 days
     today = datetime.now()
     from_date = (today - timedelta(days=7)).strftime("%Y-%m-%d")
     to_date = today.strftime("%Y-%m-%d")
 
-    url = f"https://api.football-data.org/v4/competitions/PL/matches?dateFrom={from_date}&dateTo={to_date}"
-    response = requests.get(url, headers=HEADERS)
+    url = f"{config.football_data_url()}/competitions/{competition}/matches?dateFrom={from_date}&dateTo={to_date}"
+    response = get_client().get(url, headers=config.football_data_headers(), cache=True)
     
     if response.status_code != 200:
-        print("❌ Error fetching results:", response.text)
+        log.error("❌ Error fetching %s results: %s %s", competition, response.status_code, response.text)
         return []
 
     data = response.json()
@@ -93,61 +51,165 @@ def fetch_recent_results():
                 'away_team': normalize_team_name(match['awayTeam']['name']),
                 'date': match['utcDate'][:10],
                 'actual_result': result,
-                'score_actual': f"{home_score}-{away_score}"
+                'score_actual': f"{home_score}-{away_score}",
+                'home_goals': home_score,
+                'away_goals': away_score
             })
     
-    print(f"✅ Fetched {len(results)} finished matches")
+    log.info("✅ Fetched %d finished %s matches", len(results), competition,
+             extra={'data': {'stage': 'fetch', 'competition': competition, 'matches': len(results)}})
     return results
 
 # ====================
 # Update Predictions with Actual Results
 # ====================
-def update_predictions_with_results():
-    results = fetch_recent_results()
-    updated = 0
+@metrics.stage('reconcile')
+def update_predictions_with_results(results=None, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Reconcile finished matches with stored predictions: one query for all
+    candidate rows, an in-memory join, then chunked bulk upserts on id.
+    Returns counts plus the results that had no prediction row.
+    """
+    if results is None:
+        results = fetch_recent_results()
+    stats = {"updated": 0, "failed": 0, "unmatched": []}
+    if not results:
+        log.info("📊 Updated 0 matches with actual results", extra={'data': {'stage': 'reconcile', 'updated': 0}})
+        return stats
+
+    # All predictions on the result dates, in one request
+    rest_url, headers = config.supabase_rest_url(), config.supabase_headers()
+    try:
+        records = select_rows(rest_url, headers, 'predictions', {
+            'date': in_filter(sorted({r['date'] for r in results}))
+        })
+    except Exception as e:
+        log.error("❌ Error fetching predictions: %s", e)
+        stats["failed"] = len(results)
+        return stats
+
+    by_key = {}
+    for record in records:
+        by_key.setdefault((record['home_team'], record['away_team'], record['date']), []).append(record)
 
+    # Join results to predictions and score them
+    now = datetime.now().isoformat()
+    rows = []
     for result in results:
-        # URL-encode team names
-        home_encoded = quote(result['home_team'])
-        away_encoded = quote(result['away_team'])
-        date_encoded = quote(result['date'])
+        matched = by_key.get((result['home_team'], result['away_team'], result['date']))
+        if not matched:
+            stats["unmatched"].append(result)
+            continue
+        for record in matched:
+            # Full row, so the upsert never trips NOT NULL columns on the insert path
+            row = dict(record)
+            row.update({
+                "actual_result": result['actual_result'],
+                "score_actual": result['score_actual'],
+                "correct": record['prediction'] == result['actual_result'],
+                "updated_at": now
+            })
+            rows.append(row)
 
-        check_url = f"{SUPABASE_REST_URL}/predictions?home_team=eq.{home_encoded}&away_team=eq.{away_encoded}&date=eq.{date_encoded}"
-        
+    for chunk in chunked(rows, chunk_size):
         try:
-            response = requests.get(check_url, headers=SUPABASE_HEADERS)
-            if response.status_code == 200 and len(response.json()) > 0:
-                record = response.json()[0]
-                
-                # Determine if prediction was correct
-                correct = record['prediction'] == result['actual_result']
-                
-                # Update record
-                update_url = f"{SUPABASE_REST_URL}/predictions?id=eq.{record['id']}"
-                payload = {
-                    "actual_result": result['actual_result'],
-                    "score_actual": result['score_actual'],
-                    "correct": correct,
-                    "updated_at": datetime.now().isoformat()
-                }
-                
-                patch_response = requests.patch(update_url, json=payload, headers=SUPABASE_HEADERS)
-                if patch_response.status_code in [200, 204]:
-                    print(f"✅ Updated: {result['home_team']} vs {result['away_team']} → {result['actual_result']} ({'✅ Correct' if correct else '❌ Wrong'})")
-                    updated += 1
-                else:
-                    print(f"❌ Failed to update: {patch_response.text}")
-            else:
-                print(f"⚠️ No prediction found for {result['home_team']} vs {result['away_team']} on {result['date']}")
+            upsert_rows(rest_url, headers, 'predictions', chunk, ('id',))
+            stats["updated"] += len(chunk)
         except Exception as e:
-            print(f"❌ Error updating {result['home_team']} vs {result['away_team']}: {e}")
+            log.warning("⚠️ Bulk update failed (%s: %s), falling back to per-row updates", type(e).__name__, e)
+            for row in chunk:
+                if patch_prediction(row):
+                    stats["updated"] += 1
+                else:
+                    stats["failed"] += 1
+
+    correct = sum(1 for row in rows if row['correct'])
+    for result in stats["unmatched"]:
+        log.debug("⚠️ No prediction found for %s vs %s on %s", result['home_team'], result['away_team'], result['date'])
+    log.info("📊 Updated %d matches with actual results (%d/%d correct, %d failed, %d without a prediction)",
+             stats['updated'], correct, len(rows), stats['failed'], len(stats['unmatched']),
+             extra={'data': {'stage': 'reconcile', 'updated': stats['updated'], 'correct': correct,
+                             'failed': stats['failed'], 'unmatched': len(stats['unmatched'])}})
+    return stats
 
-    print(f"📊 Updated {updated} matches with actual results")
+def patch_prediction(row):
+    """Fallback: write one reconciled row with a PATCH by id"""
+    update_url = f"{config.supabase_rest_url()}/predictions?id=eq.{quote(str(row['id']))}"
+    payload = {k: row[k] for k in ("actual_result", "score_actual", "correct", "updated_at")}
+    try:
+        patch_response = get_client().patch(update_url, json=payload, headers=config.supabase_headers(), timeout=DEFAULT_TIMEOUT)
+        if patch_response.status_code in [200, 204]:
+            return True
+        log.error("❌ Failed to update %s vs %s: %s", row['home_team'], row['away_team'], patch_response.text)
+    except Exception as e:
+        log.error("❌ Error updating %s vs %s: %s", row['home_team'], row['away_team'], e)
+    return False
+
+# ====================
+# Apply Results to Saved ELO State
+# ====================
+@metrics.stage('elo')
+def update_elo_state(results, competition=DEFAULT_COMPETITION, engine=None):
+    """
+    Apply new finished matches to a competition's saved ELO ratings (no full
+    replay). `engine` is an already-loaded EloEngine to update in place.
+    """
+    from elo import EloEngine
+
+    path = artifact_path(competition, 'elo')
+    if engine is None:
+        if not os.path.exists(path):
+            log.warning("⚠️ No ELO state at %s. Run 'python train_model.py --competition %s' first.", path, competition)
+            return 0
+        engine = EloEngine.load(path)
+    applied = engine.apply_results(results)
+    if applied:
+        engine.save(path)
+    log.info("📈 Applied %d new results to %s ELO ratings", applied, competition,
+             extra={'data': {'stage': 'elo', 'competition': competition, 'applied': applied}})
+    return applied
+
+# ====================
+# Apply Results to Saved Team Form
+# ====================
+@metrics.stage('form')
+def update_form_state(results, competition=DEFAULT_COMPETITION, state=None):
+    """Apply new finished matches to the competition's team form (skips ones already counted)"""
+    import calculate_form
+    return calculate_form.update_form_state(results, competition, state)
+
+def process_competition(competition, results=None, engine=None, form_state=None):
+    """
+    Fetch (unless `results` are given), reconcile and fold one competition's
+    recent results into its ELO and form. `engine` and `form_state` are
+    already-loaded state to update in place instead of reading it from disk.
+    """
+    if results is None:
+        log.debug("📅 Fetching recent %s results...", competition)
+        results = fetch_recent_results(competition)
+    stats = update_predictions_with_results(results)
+    metrics.inc('fixtures_total', len(results), outcome='finished', competition=competition)
+    metrics.inc('fixtures_total', stats['updated'], outcome='reconciled', competition=competition)
+    metrics.inc('fixtures_total', stats['failed'], outcome='failed', competition=competition)
+    metrics.inc('fixtures_total', len(stats['unmatched']), outcome='unmatched', competition=competition)
+    update_elo_state(results, competition, engine)
+    update_form_state(results, competition, form_state)
+    return stats
 
 # ====================
 # Main
 # ====================
 if __name__ == "__main__":
-    print("📅 Fetching recent match results...")
-    update_predictions_with_results()
-    print("🚀 Prediction accuracy tracking complete!")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reconcile recent results with stored predictions")
+    add_competitions_argument(parser)
+    add_log_level_argument(parser)
+    args = parser.parse_args()
+    configure(level=args.log_level)
+
+    # Competitions run side by side; football-data.org calls share one rate limiter
+    run_concurrently(args.competitions or enabled_competitions(), process_competition)
+    get_client().report()
+    report_unresolved()
+    prom_path, json_path = metrics.write_run_metrics('fetch_matches')
+    log.info("📈 Metrics written to %s and %s", prom_path, json_path)
+    log.info("🚀 Prediction accuracy tracking complete!")
\ No newline at end of file
@@ -0,0 +1,183 @@
+# fixture_loader.py
+# Streaming loader for API-Football fixture dumps ({"response": [fixture, ...]})
+# Shared by train_model.py and calculate_form.py.
+
+import json
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from log_config import get_logger
+
+READ_CHUNK = 1 << 16  # characters per read
+FINISHED = "Match Finished"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+log = get_logger('fixtures')
+
+
+# ====================
+# Incremental JSON Reader
+# ====================
+class _StreamReader:
+    """Text buffer over a file that only holds the part still being parsed"""
+
+    def __init__(self, f, chunk_size=READ_CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed so memory stays bounded
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch == '' or ch not in chars:
+            raise ValueError(f"expected one of {chars!r}, got {ch!r}")
+        self.pos += 1
+        return ch
+
+    def skip_to(self, char):
+        """Skip anything before the first `char` (e.g. log lines before the JSON)"""
+        while True:
+            i = self.buf.find(char, self.pos)
+            if i != -1:
+                self.pos = i
+                return True
+            self.pos = len(self.buf)
+            if not self._fill():
+                return False
+
+    def value(self):
+        """Decode one JSON value, reading more of the file as needed"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number ending the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof or not isinstance(obj, (int, float)):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                self.pos = end
+                return obj
+
+
+def iter_fixtures(path, chunk_size=READ_CHUNK):
+    """
+    Yield fixtures from the top-level `response` array one at a time, without
+    loading the whole document. A truncated file yields every complete
+    fixture before the cut.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _StreamReader(f, chunk_size)
+        if not reader.skip_to('{'):
+            raise ValueError("No valid JSON found")
+        reader.expect('{')
+
+        while reader.peek() != '}':
+            key = reader.value()
+            reader.expect(':')
+            if key != 'response':
+                reader.value()  # small metadata value (get, parameters, paging, ...)
+                reader.expect(',}')
+                continue
+
+            reader.expect('[')
+            while True:
+                ch = reader.peek()
+                if ch == ']':
+                    return
+                try:
+                    if ch == ',':
+                        reader.pos += 1
+                    yield reader.value()
+                except json.JSONDecodeError:
+                    log.warning("⚠️ Fixture file %s is truncated; using the complete fixtures before the cut", path)
+                    return
+
+        raise ValueError("No 'response' in data")
+
+
+# ====================
+# Finished Matches as a DataFrame
+# ====================
+def load_match_data(path):
+    """
+    Stream finished matches from an API-Football fixtures file into a
+    date-sorted DataFrame (date, home_team, away_team, home_goals, away_goals).
+    Teams are interned as integer codes and goals kept as int16 while
+    streaming, so memory grows with the number of matches, not the file size.
+    """
+    dates = []
+    team_codes = {}
+    home_ids, away_ids = array('i'), array('i')
+    home_goals, away_goals = array('h'), array('h')
+
+    try:
+        for fixture in iter_fixtures(path):
+            # Skip if not finished
+            status = fixture.get('fixture', {}).get('status', {}).get('long')
+            if status != FINISHED:
+                continue
+
+            goals = fixture.get('goals', {})
+            if goals.get('home') is None or goals.get('away') is None:
+                continue
+
+            teams = fixture['teams']
+            dates.append(fixture['fixture']['date'])
+            home_ids.append(team_codes.setdefault(teams['home']['name'], len(team_codes)))
+            away_ids.append(team_codes.setdefault(teams['away']['name'], len(team_codes)))
+            home_goals.append(goals['home'])
+            away_goals.append(goals['away'])
+    except FileNotFoundError as e:
+        log.error("❌ Error reading file: %s", e)
+        return pd.DataFrame()
+    except (ValueError, KeyError) as e:
+        log.error("❌ Error parsing fixtures in %s: %s", path, e)
+        return pd.DataFrame()
+
+    if not dates:
+        log.error("❌ No valid matches loaded from %s", path)
+        return pd.DataFrame()
+
+    names = np.array(list(team_codes), dtype=object)
+    df = pd.DataFrame({
+        'date': pd.to_datetime(dates),
+        'home_team': names[np.frombuffer(home_ids, dtype=np.int32)],
+        'away_team': names[np.frombuffer(away_ids, dtype=np.int32)],
+        'home_goals': np.frombuffer(home_goals, dtype=np.int16).astype(np.int64),
+        'away_goals': np.frombuffer(away_goals, dtype=np.int16).astype(np.int64)
+    })
+    df = df.sort_values('date').reset_index(drop=True)
+    log.info("✅ Loaded %d finished matches from %s", len(df), path)
+    return df
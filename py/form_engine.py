@@ -0,0 +1,91 @@
+# form_engine.py
+# Single-pass rolling team form (last N games) for feature generation
+
+from collections import deque
+import numpy as np
+
+# Order of the per-team form columns returned by rolling_form_features()
+FORM_KEYS = ['win_rate', 'draw_rate', 'loss_rate', 'goals_per_game', 'goals_conceded_per_game']
+
+
+# ====================
+# Per-Team Rolling Window
+# ====================
+class RollingForm:
+    """Fixed-size window of each team's most recent results and goals"""
+
+    def __init__(self, window=5):
+        self.window = window
+        self.history = {}  # team -> deque of (win, draw, loss, scored, conceded)
+
+    def push(self, home_team, away_team, home_goals, away_goals):
+        """Add a finished match to both teams' windows"""
+        home_goals, away_goals = int(home_goals), int(away_goals)
+        if home_goals > away_goals:
+            home_res, away_res = (1, 0, 0), (0, 0, 1)
+        elif home_goals < away_goals:
+            home_res, away_res = (0, 0, 1), (1, 0, 0)
+        else:
+            home_res, away_res = (0, 1, 0), (0, 1, 0)
+
+        self._team(home_team).append(home_res + (home_goals, away_goals))
+        self._team(away_team).append(away_res + (away_goals, home_goals))
+
+    def form(self, team):
+        """Current form of `team` as a tuple ordered like FORM_KEYS"""
+        games = self.history.get(team)
+        if not games:
+            return (0.0, 0.0, 0.0, 0.0, 0.0)
+        n = len(games)
+        wins, draws, losses, scored, conceded = (sum(col) for col in zip(*games))
+        return (wins / n, draws / n, losses / n, scored / n, conceded / n)
+
+    def form_dict(self, team):
+        """Same as form() but keyed like train_model.get_team_form()"""
+        return dict(zip(FORM_KEYS, self.form(team)))
+
+    def _team(self, team):
+        games = self.history.get(team)
+        if games is None:
+            games = self.history[team] = deque(maxlen=self.window)
+        return games
+
+
+# ====================
+# Pre-Match Form for Every Row
+# ====================
+def rolling_form_features(df, window=5):
+    """
+    Walk date-sorted matches once and return (home_form, away_form) arrays of
+    shape (len(df), len(FORM_KEYS)) holding each side's form before kickoff.
+
+    Matches sharing a kickoff time are all scored before any of them is added
+    to the windows, matching the strict `date < match date` cut-off of
+    get_team_form().
+    """
+    n = len(df)
+    home_form = np.zeros((n, len(FORM_KEYS)))
+    away_form = np.zeros((n, len(FORM_KEYS)))
+    if n == 0:
+        return home_form, away_form
+
+    dates = df['date'].values
+    home_teams = df['home_team'].to_numpy()
+    away_teams = df['away_team'].to_numpy()
+    home_goals = df['home_goals'].to_numpy()
+    away_goals = df['away_goals'].to_numpy()
+
+    engine = RollingForm(window)
+    start = 0
+    for i in range(1, n + 1):
+        if i < n and dates[i] == dates[start]:
+            continue
+        # Rows [start, i) kick off together: emit first, then update
+        for j in range(start, i):
+            home_form[j] = engine.form(home_teams[j])
+            away_form[j] = engine.form(away_teams[j])
+        for j in range(start, i):
+            engine.push(home_teams[j], away_teams[j], home_goals[j], away_goals[j])
+        start = i
+
+    return home_form, away_form
@@ -0,0 +1,272 @@
+# http_client.py
+# Shared HTTP client for football-data.org and Supabase:
+# pooled keep-alive connections, retries with backoff, API quota, per-endpoint stats,
+# and an opt-in on-disk response cache for GETs (get(url, cache=True))
+
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from log_config import get_logger
+from response_cache import ResponseCache
+
+DEFAULT_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+POOL_SIZE = 16
+# Retried with backoff on idempotent verbs. POST is left out: a retried insert could be applied twice.
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'})
+
+# football-data.org free tier: 10 requests per minute
+FOOTBALL_DATA_HOST = "api.football-data.org"
+FOOTBALL_DATA_RATE_LIMIT = int(os.getenv("FOOTBALL_DATA_RATE_LIMIT", "10"))
+# HTTP_CACHE=0 turns the response cache off (every cache=True GET goes to the server)
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+
+log = get_logger('http')
+
+
+# ====================
+# Token Bucket (API quota)
+# ====================
+class TokenBucket:
+    """Allow `rate` requests per `per` seconds, blocking callers until a token is free"""
+
+    def __init__(self, rate, per=60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token; returns seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.fill_rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self, seconds):
+        """Server says the quota is used up: no tokens for `seconds`"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.fill_rate + 1)
+
+
+# ====================
+# Client
+# ====================
+class HttpClient:
+    """requests.Session wrapper shared by all scripts"""
+
+    def __init__(self, retries=MAX_RETRIES, backoff=BACKOFF_FACTOR, pool_size=POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 cache=None):
+        self.timeout = timeout
+        self.cache = cache  # ResponseCache for get(..., cache=True), or None
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+
+        # One connection pool per host, kept alive between requests. No adapter-level retries:
+        # request() retries itself, so every attempt takes a quota token and shows up in the stats.
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.rate_limits = {}  # host -> TokenBucket
+        self.stats = defaultdict(lambda: {'requests': 0, 'errors': 0, 'total_time': 0.0, 'max_time': 0.0, 'throttled': 0.0})
+        self.cache_stats = defaultdict(int)  # 'hit' / 'revalidated' / 'miss' -> count
+        self.stats_lock = threading.Lock()
+
+    def set_rate_limit(self, host, rate, per=60.0):
+        self.rate_limits[host] = TokenBucket(rate, per)
+
+    # --------------------
+    # Requests
+    # --------------------
+    def request(self, method, url, **kwargs):
+        """
+        Send one request, retrying 429s (any verb) and connection errors and
+        5xx responses (idempotent verbs) with backoff. Every attempt takes a
+        quota token and is recorded.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        parts = urlsplit(url)
+        endpoint = f"{method.upper()} {parts.netloc}{parts.path}"
+        bucket = self.rate_limits.get(parts.netloc)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        for attempt in range(self.retries + 1):
+            waited = bucket.acquire() if bucket else 0.0
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(method, parts, time.perf_counter() - start, waited, status=None)
+                if not idempotent or attempt == self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                log.warning("🔁 %s on %s, retrying in %.1f s (attempt %d/%d)", type(e).__name__, endpoint, delay,
+                            attempt + 1, self.retries)
+                time.sleep(delay)
+                continue
+            except requests.RequestException:
+                self._record(method, parts, time.perf_counter() - start, waited, status=None)
+                raise
+            self._record(method, parts, time.perf_counter() - start, waited, status=response.status_code)
+
+            if bucket and response.headers.get('X-Requests-Available-Minute') == '0':
+                bucket.drain(float(response.headers.get('X-RequestCounter-Reset', 60)))
+
+            # Over quota: wait as long as the server asks, then try again
+            if response.status_code == 429 and attempt < self.retries:
+                delay = self._retry_after(response, attempt)
+                log.warning("⏳ 429 from %s, retrying in %.1f s (attempt %d/%d)", endpoint, delay, attempt + 1, self.retries)
+                if bucket:
+                    bucket.drain(delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            # Transient server error
+            if response.status_code in RETRY_STATUSES and idempotent and attempt < self.retries:
+                delay = self._retry_after(response, attempt)
+                log.warning("🔁 %d from %s, retrying in %.1f s (attempt %d/%d)", response.status_code, endpoint, delay,
+                            attempt + 1, self.retries)
+                time.sleep(delay)
+                continue
+            return response
+        return response
+
+    def get(self, url, cache=False, **kwargs):
+        """
+        GET `url`. With `cache` (True, or a TTL in seconds) a fresh stored
+        response is returned without a request; a stale one is revalidated
+        with If-None-Match/If-Modified-Since and reused on 304.
+        """
+        if not cache or self.cache is None:
+            return self.request('GET', url, **kwargs)
+
+        ttl = None if cache is True else cache
+        endpoint = urlsplit(url)
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry, ttl):
+            self._record_cache(endpoint, 'hit')
+            return self._cached_response(url, entry)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry:
+            headers.update(ResponseCache.validators(entry))
+        response = self.request('GET', url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.touch(url, entry)
+            self._record_cache(endpoint, 'revalidated')
+            return self._cached_response(url, entry)
+        if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+            self.cache.put(url, response.headers, response.text)
+        self._record_cache(endpoint, 'miss')
+        return response
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    @staticmethod
+    def _cached_response(url, entry):
+        """A requests.Response rebuilt from a cache entry (X-Cache: HIT)"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = entry['body'].encode('utf-8')
+        response.headers.update(entry['headers'])
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    def _retry_after(self, response, attempt):
+        for header in ('Retry-After', 'X-RequestCounter-Reset'):
+            value = response.headers.get(header)
+            if value and value.isdigit():
+                return float(value)
+        return self.backoff * (2 ** attempt)
+
+    # --------------------
+    # Stats
+    # --------------------
+    def _record(self, method, parts, elapsed, waited, status):
+        """Per-endpoint stats for report(), plus run metrics by endpoint and status (None: no response)"""
+        endpoint = f"{method.upper()} {parts.netloc}{parts.path}"
+        error = status is None or status >= 400
+        labels = {'method': method.upper(), 'endpoint': f"{parts.netloc}{parts.path}", 'status': str(status) if status else 'error'}
+        metrics.inc('http_requests_total', **labels)
+        metrics.observe('http_request_duration_seconds', elapsed, **labels)
+
+        with self.stats_lock:
+            s = self.stats[endpoint]
+            s['requests'] += 1
+            s['errors'] += int(error)
+            s['total_time'] += elapsed
+            s['max_time'] = max(s['max_time'], elapsed)
+            s['throttled'] += waited
+
+    def _record_cache(self, parts, result):
+        metrics.inc('http_cache_total', endpoint=f"{parts.netloc}{parts.path}", result=result)
+        with self.stats_lock:
+            self.cache_stats[result] += 1
+
+    def report(self):
+        """Log one summary line, plus request count and latency per endpoint at debug level"""
+        if not self.stats and not self.cache_stats:
+            return
+        with self.stats_lock:
+            stats = {endpoint: dict(s) for endpoint, s in self.stats.items()}
+            cache_stats = dict(self.cache_stats)
+        requests = sum(s['requests'] for s in stats.values())
+        errors = sum(s['errors'] for s in stats.values())
+        throttled = sum(s['throttled'] for s in stats.values())
+        log.info("📡 HTTP: %d requests, %d errors, throttled %.1f s across %d endpoints",
+                 requests, errors, throttled, len(stats),
+                 extra={'data': {'stage': 'http', 'requests': requests, 'errors': errors, 'throttled_s': round(throttled, 3)}})
+        if cache_stats:
+            log.info("🗃️ HTTP cache: %d hits, %d revalidated (304), %d misses",
+                     cache_stats.get('hit', 0), cache_stats.get('revalidated', 0), cache_stats.get('miss', 0),
+                     extra={'data': {'stage': 'http_cache', **cache_stats}})
+        for endpoint, s in sorted(stats.items()):
+            log.debug("  %s: %d requests, %d errors, avg %.0f ms, max %.0f ms, throttled %.1f s",
+                      endpoint, s['requests'], s['errors'], 1000 * s['total_time'] / s['requests'],
+                      1000 * s['max_time'], s['throttled'])
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(cache=ResponseCache() if HTTP_CACHE_ENABLED else None)
+            _client.set_rate_limit(FOOTBALL_DATA_HOST, FOOTBALL_DATA_RATE_LIMIT)
+        return _client
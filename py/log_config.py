@@ -0,0 +1,95 @@
+# log_config.py
+# Pipeline logging on top of the stdlib `logging` module:
+#   - level from --log-level or LOG_LEVEL (default INFO); per-fixture detail is DEBUG
+#   - %-style arguments are only formatted when the level is enabled
+#   - plain lines on a terminal, NDJSON when stdout is redirected (LOG_FORMAT=text|json overrides)
+#   - API keys, bearer tokens and JWTs are redacted from every record
+
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT")  # None: pick from whether stdout is a TTY
+ROOT_LOGGER = 'soccer'
+
+# Environment variables whose values must never reach the log
+SECRET_ENV_VARS = ('SUPABASE_ANON_KEY', 'SUPABASE_SERVICE_KEY', 'FOOTBALL_DATA_API_KEY', 'API_FOOTBALL_KEY')
+SECRET_PATTERNS = [
+    re.compile(r'eyJ[\w-]+\.[\w-]+\.[\w-]+'),  # JWTs (Supabase keys)
+    re.compile(r'(?i)(bearer\s+)[^\s\'",}]+'),
+    re.compile(r'(?i)((?:apikey|api_key|x-auth-token|token)[\'"]?\s*[:=]\s*[\'"]?)[^\s\'",&}]+')
+]
+REDACTED = '***'
+
+
+def redact(text):
+    """`text` with secret env values and anything that looks like a key replaced"""
+    for var in SECRET_ENV_VARS:
+        value = os.getenv(var)
+        if value and len(value) >= 6:
+            text = text.replace(value, REDACTED)
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(lambda m: (m.group(1) if m.groups() else '') + REDACTED, text)
+    return text
+
+
+class RedactFilter(logging.Filter):
+    """Formats the message once (only for records that passed the level check) and redacts it"""
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        data = getattr(record, 'data', None)
+        if data:
+            record.data = {k: redact(v) if isinstance(v, str) else v for k, v in data.items()}
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, plus any `extra={'data': {...}}` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update(getattr(record, 'data', None) or {})
+        if record.exc_info:
+            entry['exc'] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure(level=None, fmt=None, stream=None):
+    """(Re)configure the pipeline loggers; safe to call more than once"""
+    stream = stream or sys.stdout
+    fmt = fmt or LOG_FORMAT or ('text' if stream.isatty() else 'json')
+
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(RedactFilter())
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter('%(message)s'))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel((level or LOG_LEVEL).upper())
+    root.propagate = False
+    return root
+
+
+def get_logger(name):
+    """Logger under the pipeline root, configured from the environment on first use"""
+    if not logging.getLogger(ROOT_LOGGER).handlers:
+        configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def add_log_level_argument(parser):
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], type=str.upper,
+                        default=None, help="Log verbosity (default: LOG_LEVEL or INFO); DEBUG shows per-fixture detail")
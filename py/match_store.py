@@ -0,0 +1,207 @@
+# match_store.py
+# Columnar, memory-mapped cache of finished matches, rebuilt only when the
+# source fixtures JSON changes.
+#
+#   python match_store.py ../data/2023_epl_fixtures.json --bench
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import fixture_loader
+from log_config import get_logger
+
+CACHE_DIR = None  # default: a 'cache' folder next to the source file
+STORE_VERSION = 1
+COLUMNS = ('date', 'home_id', 'away_id', 'home_goals', 'away_goals')
+
+log = get_logger('match_store')
+
+
+def source_hash(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ====================
+# Store
+# ====================
+class MatchStore:
+    """
+    Finished matches as parallel arrays: int32 team IDs (with a name
+    dictionary), datetime64 UTC kickoffs and int16 goals.
+    """
+
+    def __init__(self, teams, arrays, meta):
+        self.teams = teams
+        self.meta = meta
+        self.date = arrays['date']
+        self.home_id = arrays['home_id']
+        self.away_id = arrays['away_id']
+        self.home_goals = arrays['home_goals']
+        self.away_goals = arrays['away_goals']
+
+    def __len__(self):
+        return len(self.date)
+
+    def to_frame(self):
+        """Same DataFrame as fixture_loader.load_match_data()"""
+        names = np.array(self.teams, dtype=object)
+        return pd.DataFrame({
+            'date': pd.Series(self.date).dt.tz_localize('UTC'),
+            'home_team': names[self.home_id],
+            'away_team': names[self.away_id],
+            'home_goals': self.home_goals.astype(np.int64),
+            'away_goals': self.away_goals.astype(np.int64)
+        })
+
+
+def store_dir_for(path, cache_dir=CACHE_DIR):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), 'cache')
+    return os.path.join(cache_dir, os.path.splitext(os.path.basename(path))[0])
+
+
+def _stat(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def build_store(path, store_dir):
+    """Parse `path` once and write the columnar store to `store_dir`"""
+    df = fixture_loader.load_match_data(path)
+    if df.empty:
+        return None
+
+    teams = list(dict.fromkeys(df['home_team'].tolist() + df['away_team'].tolist()))
+    team_ids = {name: i for i, name in enumerate(teams)}
+    arrays = {
+        'date': df['date'].dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(),
+        'home_id': df['home_team'].map(team_ids).to_numpy(np.int32),
+        'away_id': df['away_team'].map(team_ids).to_numpy(np.int32),
+        'home_goals': df['home_goals'].to_numpy(np.int16),
+        'away_goals': df['away_goals'].to_numpy(np.int16)
+    }
+    meta = {
+        'version': STORE_VERSION,
+        'source': os.path.abspath(path),
+        'source_hash': source_hash(path),
+        'matches': len(df),
+        'teams': teams,
+        **_stat(path)
+    }
+
+    # Write next to the final location, then swap in, so readers never see half a store
+    tmp_dir = store_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arr)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+
+    return MatchStore(teams, arrays, meta)
+
+
+def _read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, 'meta.json'), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def open_store(path, cache_dir=CACHE_DIR):
+    """
+    Open the cached store for `path`, rebuilding it only if the source's
+    hash changed. A matching size and mtime skip hashing altogether.
+    Returns None if the source is missing or has no finished matches.
+    """
+    if not os.path.exists(path):
+        return None
+    store_dir = store_dir_for(path, cache_dir)
+    meta = _read_meta(store_dir)
+    stat = _stat(path)
+
+    valid = meta is not None and meta.get('version') == STORE_VERSION
+    if valid and (meta['size'], meta['mtime_ns']) != (stat['size'], stat['mtime_ns']):
+        valid = meta['source_hash'] == source_hash(path)
+        if valid:
+            # Touched but unchanged: remember the new stat to skip hashing next time
+            meta.update(stat)
+            with open(os.path.join(store_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+    if not valid:
+        log.info("🗂️ Building match store for %s...", path)
+        return build_store(path, store_dir)
+
+    arrays = {name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+    return MatchStore(meta['teams'], arrays, meta)
+
+
+def load_match_data(path, cache_dir=CACHE_DIR):
+    """Finished matches from the cached store (built on first use)"""
+    store = open_store(path, cache_dir)
+    if store is None:
+        return pd.DataFrame()
+    df = store.to_frame()
+    log.info("✅ Loaded %d finished matches from %s", len(df), path)
+    return df
+
+
+def matchday_index(dates):
+    """Matchday number per match: one per Wednesday-to-Tuesday week, so a weekend round and its Monday game stay together"""
+    weeks = dates.dt.tz_localize(None).dt.to_period('W-TUE')
+    return (weeks - weeks.min()).map(lambda offset: offset.n).to_numpy()
+
+
+# ====================
+# Benchmark
+# ====================
+def benchmark(path, cache_dir=CACHE_DIR, repeat=5):
+    """Time a cold (parse + build) load against warm (mmap) loads"""
+    shutil.rmtree(store_dir_for(path, cache_dir), ignore_errors=True)
+
+    start = time.perf_counter()
+    open_store(path, cache_dir).to_frame()
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        open_store(path, cache_dir).to_frame()
+        warm.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    fixture_loader.load_match_data(path)
+    parse = time.perf_counter() - start
+
+    log.info("⏱️ Parse JSON: %.1f ms | cold store build: %.1f ms | warm open: %.2f ms (best of %d)",
+             parse * 1000, cold * 1000, min(warm) * 1000, repeat)
+    return {'parse_s': parse, 'cold_s': cold, 'warm_s': min(warm)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or benchmark the columnar match store")
+    parser.add_argument('path', nargs='?', default='../data/2023_epl_fixtures.json')
+    parser.add_argument('--bench', action='store_true', help="Compare cold vs warm load times")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.path)
+    else:
+        store = open_store(args.path)
+        print(f"✅ Match store ready: {len(store) if store else 0} matches")
@@ -0,0 +1,192 @@
+# metrics.py
+# In-process run metrics: cumulative stage timers, counters and latency
+# histograms, written at the end of a run as a Prometheus textfile
+# (node_exporter textfile collector format) and a JSON summary.
+#
+# Stage seconds are per-thread time added up: stages that run on several
+# threads at once (--async uploads, competitions side by side) can sum to
+# more than the run's wall time.
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'metrics'))
+PREFIX = 'soccer_'
+# Upper bounds (seconds) of the HTTP latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'stage_seconds_total': ('counter', "Time spent in each pipeline stage, summed over threads"),
+    'stage_calls_total': ('counter', "Times each pipeline stage ran"),
+    'http_requests_total': ('counter', "HTTP requests by endpoint and status"),
+    'http_request_duration_seconds': ('histogram', "HTTP request latency by endpoint and status"),
+    'http_cache_total': ('counter', "Cached GETs by result (hit, revalidated, miss)"),
+    'fixtures_total': ('counter', "Fixtures by pipeline outcome (predicted, created, updated, failed, ...)"),
+    'competition_failures_total': ('counter', "Competitions whose run raised (the others still ran)"),
+    'run_duration_seconds': ('gauge', "Wall time of the whole run"),
+    'run_timestamp_seconds': ('gauge', "Unix time the run finished")
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_started = time.time()
+_active = threading.local()  # stages running on the current thread
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Add one observation to a histogram with LATENCY_BUCKETS"""
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                h[i] += 1
+        h[-2] += 1
+        h[-1] += value
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block; repeated entries of the same stage add up. A stage entered
+    again inside itself on the same thread (e.g. bulk upload falling back to
+    per-row uploads) is only timed by the outer block, so nothing counts twice.
+    """
+    active = _active.__dict__.setdefault('stages', set())
+    if name in active:
+        yield
+        return
+    active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.discard(name)
+        inc('stage_seconds_total', time.perf_counter() - start, stage=name)
+        inc('stage_calls_total', stage=name)
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.time()
+
+
+# ====================
+# Export
+# ====================
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _snapshot():
+    now = time.time()
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    gauges = {
+        _key('run_duration_seconds', {}): now - _started,
+        _key('run_timestamp_seconds', {}): now
+    }
+    return counters, histograms, gauges
+
+
+def prometheus_text(job):
+    """Prometheus exposition text for everything recorded so far; every series gets a job label"""
+    counters, histograms, gauges = _snapshot()
+    job_label = (('job', job),)
+    lines = []
+    names = sorted({name for name, _ in list(counters) + list(histograms) + list(gauges)})
+    for name in names:
+        default_kind = 'histogram' if any(n == name for n, _ in histograms) else 'counter' if name.endswith('_total') else 'gauge'
+        kind, help_text = HELP.get(name, (default_kind, name))
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for (n, labels), value in sorted(list(counters.items()) + list(gauges.items())):
+            if n == name:
+                lines.append(f"{PREFIX}{name}{_labels(job_label + labels)} {_number(value)}")
+        for (n, labels), h in sorted(histograms.items()):
+            if n != name:
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, h):
+                lines.append(f"{PREFIX}{name}_bucket{_labels(job_label + labels, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{PREFIX}{name}_bucket{_labels(job_label + labels, [('le', '+Inf')])} {h[-2]}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(job_label + labels)} {_number(h[-1])}")
+            lines.append(f"{PREFIX}{name}_count{_labels(job_label + labels)} {h[-2]}")
+    return '\n'.join(lines) + '\n'
+
+
+def summary(job):
+    """JSON-friendly view: stages, counters and per-series latency (count, mean, bucket counts)"""
+    counters, histograms, gauges = _snapshot()
+    stages = {}
+    other = []
+    for (name, labels), value in sorted(counters.items()):
+        labels = dict(labels)
+        if name in ('stage_seconds_total', 'stage_calls_total'):
+            field = 'seconds' if name == 'stage_seconds_total' else 'calls'
+            stages.setdefault(labels['stage'], {})[field] = value
+        else:
+            other.append({'name': name, 'labels': labels, 'value': value})
+    latency = [{
+        'name': name,
+        'labels': dict(labels),
+        'count': h[-2],
+        'mean_seconds': h[-1] / h[-2] if h[-2] else 0.0,
+        'buckets': dict(zip([f'{b:g}' for b in LATENCY_BUCKETS], h))
+    } for (name, labels), h in sorted(histograms.items())]
+    return {
+        'job': job,
+        'duration_seconds': gauges[_key('run_duration_seconds', {})],
+        'finished_at': gauges[_key('run_timestamp_seconds', {})],
+        'stages': stages,
+        'counters': other,
+        'histograms': latency
+    }
+
+
+def _write(path, text):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)  # textfile collectors must never read a half-written file
+
+
+def write_run_metrics(job, directory=None):
+    """Write <job>.prom and <job>.json to `directory` (METRICS_DIR); returns the two paths"""
+    directory = directory or METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    prom_path = os.path.join(directory, f"{job}.prom")
+    json_path = os.path.join(directory, f"{job}.json")
+    _write(prom_path, prometheus_text(job))
+    _write(json_path, json.dumps(summary(job), indent=2))
+    return prom_path, json_path
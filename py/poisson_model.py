@@ -0,0 +1,112 @@
+# poisson_model.py
+# Poisson goal model: team form -> expected goals -> score matrix -> outcome
+# Scores any number of fixtures in one NumPy pass.
+
+import numpy as np
+
+# ====================
+# CONFIG
+# ====================
+MAX_GOALS = 5
+BASELINE_HOME = 1.3
+BASELINE_AWAY = 1.1
+AVG_GOALS_PER_GAME = 1.4
+AVG_CONCEDED_PER_GAME = 1.3
+MIN_LAMBDA, MAX_LAMBDA = 0.3, 4.0
+
+# Form used for teams missing from team_form
+DEFAULT_FORM = {
+    'win_rate': 0.5, 'draw_rate': 0.2, 'loss_rate': 0.3,
+    'goals_per_game': 1.4, 'goals_conceded_per_game': 1.3
+}
+
+OUTCOMES = np.array(["Home Win", "Draw", "Away Win"])
+
+# Precomputed (G, G) outcome masks over [home goals, away goals]
+GOALS = np.arange(0, MAX_GOALS + 1)
+HOME_WIN_MASK = GOALS[:, None] > GOALS
+DRAW_MASK = GOALS[:, None] == GOALS
+AWAY_WIN_MASK = GOALS[:, None] < GOALS
+# log(k!) for k in GOALS (Poisson pmf without pulling in scipy at import)
+LOG_FACTORIALS = np.cumsum(np.log(np.maximum(GOALS, 1)))
+
+
+def form_arrays(keys, team_form):
+    """(goals_per_game, goals_conceded_per_game) arrays for team keys"""
+    forms = [team_form.get(k, DEFAULT_FORM) for k in keys]
+    scored = np.array([f['goals_per_game'] for f in forms], dtype=float)
+    conceded = np.array([f['goals_conceded_per_game'] for f in forms], dtype=float)
+    return scored, conceded
+
+
+def expected_goals(home_scored, home_conceded, away_scored, away_conceded):
+    """Clipped Poisson means for home and away goals"""
+    lambda_home = BASELINE_HOME * (home_scored / AVG_GOALS_PER_GAME) * (away_conceded / AVG_CONCEDED_PER_GAME)
+    lambda_away = BASELINE_AWAY * (away_scored / AVG_GOALS_PER_GAME) * (home_conceded / AVG_CONCEDED_PER_GAME)
+    return np.clip(lambda_home, MIN_LAMBDA, MAX_LAMBDA), np.clip(lambda_away, MIN_LAMBDA, MAX_LAMBDA)
+
+
+def poisson_pmf(lam):
+    """(n, G) matrix of P(goals = k) for k in GOALS and each mean in `lam`"""
+    lam = np.asarray(lam, dtype=float)[:, None]
+    return np.exp(GOALS * np.log(lam) - lam - LOG_FACTORIALS)
+
+
+def score_matrices(lambda_home, lambda_away):
+    """(n, G, G) tensor of P(home goals = i, away goals = j) per fixture"""
+    home_probs = poisson_pmf(lambda_home)
+    away_probs = poisson_pmf(lambda_away)
+    return home_probs[:, :, None] * away_probs[:, None, :]
+
+
+# ====================
+# Batch Prediction
+# ====================
+def predict_matches(home_keys, away_keys, team_form):
+    """
+    Score every fixture at once. `home_keys`/`away_keys` are team_form keys.
+    Returns a dict of per-fixture arrays: lambdas, outcome probabilities,
+    most likely score and its probability, prediction, confidence, score_pred,
+    plus the score tensor itself.
+    """
+    home_scored, home_conceded = form_arrays(home_keys, team_form)
+    away_scored, away_conceded = form_arrays(away_keys, team_form)
+    return predict_from_form(home_scored, home_conceded, away_scored, away_conceded)
+
+
+def predict_from_form(home_scored, home_conceded, away_scored, away_conceded):
+    """predict_matches() on per-fixture goals_per_game / goals_conceded_per_game arrays"""
+    lambda_home, lambda_away = expected_goals(home_scored, home_conceded, away_scored, away_conceded)
+
+    scores = score_matrices(lambda_home, lambda_away)
+    n = len(scores)
+    flat = scores.reshape(n, -1)
+
+    # Most likely score
+    best = flat.argmax(axis=1)
+    best_home, best_away = np.divmod(best, MAX_GOALS + 1)
+    score_prob = flat[np.arange(n), best]
+
+    # Total outcome probabilities
+    p_home_win = (scores * HOME_WIN_MASK).reshape(n, -1).sum(axis=1)
+    p_draw = (scores * DRAW_MASK).reshape(n, -1).sum(axis=1)
+    p_away_win = (scores * AWAY_WIN_MASK).reshape(n, -1).sum(axis=1)
+    confidence = (np.maximum(np.maximum(p_home_win, p_away_win), p_draw) * 100).astype(int)
+
+    # Predicted outcome follows the most likely score
+    prediction = OUTCOMES[np.where(best_home > best_away, 0, np.where(best_home < best_away, 2, 1))]
+
+    return {
+        'lambda_home': lambda_home,
+        'lambda_away': lambda_away,
+        'p_home_win': p_home_win,
+        'p_draw': p_draw,
+        'p_away_win': p_away_win,
+        'best_home': best_home,
+        'best_away': best_away,
+        'score_prob': score_prob,
+        'prediction': prediction,
+        'confidence': confidence,
+        'score_pred': [f"{h}-{a}" for h, a in zip(best_home.tolist(), best_away.tolist())],
+        'scores': scores
+    }
@@ -0,0 +1,315 @@
+# postgrest_stub.py
+# Local in-memory stand-in for Supabase's PostgREST API (and football-data.org
+# fixture lists), for testing uploads and timing the pipeline end to end
+#
+#   python postgrest_stub.py --port 54321 --latency-ms 50
+#   SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_ANON_KEY=test \
+#   FOOTBALL_DATA_URL=http://127.0.0.1:54321/v4 python predict_upcoming.py --async
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from competitions import COMPETITIONS, DEFAULT_COMPETITION
+
+# Unique constraints per table (used for upserts and insert conflicts)
+UNIQUE_KEYS = {
+    'predictions': ('home_team', 'away_team', 'date'),
+}
+
+
+# football-data.org names used for generated fixtures
+FOOTBALL_DATA_TEAMS = [
+    "Arsenal FC", "Aston Villa FC", "AFC Bournemouth", "Brentford FC", "Brighton & Hove Albion FC",
+    "Burnley FC", "Chelsea FC", "Crystal Palace FC", "Everton FC", "Fulham FC",
+    "Leeds United FC", "Liverpool FC", "Manchester City FC", "Manchester United FC", "Newcastle United FC",
+    "Nottingham Forest FC", "Sunderland AFC", "Tottenham Hotspur FC", "West Ham United FC", "Wolverhampton Wanderers FC"
+]
+
+
+def scheduled_fixtures(teams=FOOTBALL_DATA_TEAMS, start=None, competition="Premier League"):
+    """Double round-robin of SCHEDULED matches in football-data.org's shape"""
+    start = start or datetime(2025, 8, 16, 14, tzinfo=timezone.utc)
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    matches = []
+    for leg in range(2):
+        order = teams[:]
+        for rnd in range(n - 1):
+            kickoff = start + timedelta(weeks=leg * (n - 1) + rnd)
+            for i in range(n // 2):
+                home, away = order[i], order[n - 1 - i]
+                if leg:
+                    home, away = away, home
+                if home and away:
+                    matches.append({
+                        'utcDate': kickoff.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                        'status': 'SCHEDULED',
+                        'competition': {'name': competition},
+                        'homeTeam': {'name': home},
+                        'awayTeam': {'name': away},
+                        'score': {'fullTime': {'home': None, 'away': None}}
+                    })
+            order = [order[0]] + [order[-1]] + order[1:-1]
+    return {'matches': matches}
+
+
+# ====================
+# Filters
+# ====================
+def parse_in(value):
+    """Values of an in.(a,"b c") filter"""
+    items, current, quoted = [], '', False
+    for ch in value.strip('()'):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ',' and not quoted:
+            items.append(current)
+            current = ''
+        else:
+            current += ch
+    if current or items:
+        items.append(current)
+    return items
+
+
+def matches_filter(row, column, expr):
+    op, _, value = expr.partition('.')
+    field = row.get(column)
+    text = None if field is None else (str(field).lower() if isinstance(field, bool) else str(field))
+    if op == 'eq':
+        return text == value
+    if op == 'neq':
+        return text != value
+    if op == 'is':
+        return text == (None if value == 'null' else value)
+    if op == 'in':
+        return text in parse_in(value)
+    if text is None:
+        return False
+    if op == 'gt':
+        return text > value
+    if op == 'gte':
+        return text >= value
+    if op == 'lt':
+        return text < value
+    if op == 'lte':
+        return text <= value
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+# ====================
+# In-Memory Tables
+# ====================
+class Store:
+    def __init__(self, fixtures=None):
+        # `fixtures` (if given) is served for PL; other competitions get generated seasons
+        self.fixtures = fixtures if fixtures is not None else scheduled_fixtures()
+        self.competition_fixtures = {DEFAULT_COMPETITION: self.fixtures}
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def fixtures_for(self, competition):
+        with self.lock:
+            if competition not in self.competition_fixtures:
+                teams = [f"{competition} Club {i + 1:02d}" for i in range(18)]
+                self.competition_fixtures[competition] = scheduled_fixtures(
+                    teams, competition=COMPETITIONS.get(competition, competition))
+            return self.competition_fixtures[competition]
+
+    def rows(self, table):
+        return self.tables.setdefault(table, [])
+
+    def select(self, table, filters):
+        return [r for r in self.rows(table) if all(matches_filter(r, c, e) for c, e in filters)]
+
+    def find_conflict(self, table, row, keys):
+        return next((r for r in self.rows(table) if all(r.get(k) == row.get(k) for k in keys)), None)
+
+    def insert(self, table, row):
+        now = datetime.now(timezone.utc).isoformat()
+        new = {'id': str(uuid.uuid4()), 'created_at': now}
+        new.update(row)
+        self.rows(table).append(new)
+        return new
+
+
+class Handler(BaseHTTPRequestHandler):
+    store = None
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    # --------------------
+    # Helpers
+    # --------------------
+    def _parse(self):
+        parts = urlsplit(self.path)
+        table = parts.path.rstrip('/').split('/')[-1]
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        special = {k: v for k, v in params if k in ('select', 'on_conflict', 'order', 'limit')}
+        filters = [(k, v) for k, v in params if k not in special]
+        return table, filters, special
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def _send(self, status, payload=None):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _begin(self):
+        if self.latency:
+            time.sleep(self.latency)
+        self.store.requests += 1
+        if self.path.startswith('/rest/') and not self.headers.get('apikey'):
+            self._send(401, {'message': 'No API key found in request'})
+            return False
+        return True
+
+    @staticmethod
+    def _project(rows, special):
+        cols = special.get('select')
+        if not cols or cols == '*':
+            return rows
+        cols = cols.split(',')
+        return [{c: r.get(c) for c in cols} for r in rows]
+
+    def _football_data(self):
+        """GET /v4/competitions/<code>/matches[?status=...]"""
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        segments = parts.path.strip('/').split('/')
+        competition = segments[2] if len(segments) > 2 and segments[1] == 'competitions' else DEFAULT_COMPETITION
+        matches = self.store.fixtures_for(competition)['matches']
+        if 'status' in params:
+            matches = [m for m in matches if m['status'] == params['status']]
+        # Revalidation like a caching API: 304 when the client already has this body
+        body = json.dumps({'matches': matches}).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    # --------------------
+    # Verbs
+    # --------------------
+    def do_GET(self):
+        if not self._begin():
+            return
+        if self.path.startswith('/v4/'):
+            return self._football_data()
+        table, filters, special = self._parse()
+        try:
+            with self.store.lock:
+                rows = self.store.select(table, filters)
+        except ValueError as e:
+            return self._send(400, {'message': str(e)})
+        self._send(200, self._project(rows, special))
+
+    def do_POST(self):
+        if not self._begin():
+            return
+        table, _, special = self._parse()
+        body = self._body()
+        rows = body if isinstance(body, list) else [body]
+        prefer = self.headers.get('Prefer', '')
+        merge = 'resolution=merge-duplicates' in prefer
+        keys = tuple(special['on_conflict'].split(',')) if 'on_conflict' in special else UNIQUE_KEYS.get(table, ('id',))
+
+        written = []
+        with self.store.lock:
+            # Statement is atomic: check every row before writing any
+            seen = set()
+            for row in rows:
+                key = tuple(row.get(k) for k in keys)
+                if key in seen:
+                    return self._send(500, {'message': 'ON CONFLICT DO UPDATE command cannot affect row a second time'})
+                seen.add(key)
+                if not merge and self.store.find_conflict(table, row, keys):
+                    return self._send(409, {'message': 'duplicate key value violates unique constraint'})
+            for row in rows:
+                existing = self.store.find_conflict(table, row, keys)
+                if existing is not None:
+                    existing.update(row)
+                    written.append(existing)
+                else:
+                    written.append(self.store.insert(table, row))
+
+        if 'return=representation' in prefer:
+            self._send(201, written)
+        else:
+            self._send(201)
+
+    def do_PATCH(self):
+        if not self._begin():
+            return
+        table, filters, _ = self._parse()
+        body = self._body()
+        with self.store.lock:
+            rows = self.store.select(table, filters)
+            for row in rows:
+                row.update(body)
+        if 'return=representation' in self.headers.get('Prefer', ''):
+            self._send(200, rows)
+        else:
+            self._send(204)
+
+
+# ====================
+# Server
+# ====================
+def start_stub(port=0, latency_ms=0, store=None):
+    """Run the stub in a background thread; returns (server, base_url)"""
+    handler = type('StubHandler', (Handler,), {
+        'store': store or Store(),
+        'latency': latency_ms / 1000
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in for Supabase")
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Delay added to every request")
+    parser.add_argument('--fixtures', help="football-data.org matches JSON to serve (default: generated season)")
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+
+    server, base_url = start_stub(args.port, args.latency_ms, Store(fixtures))
+    print(f"🧪 PostgREST stub listening on {base_url}/rest/v1 (fixtures on {base_url}/v4)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,119 +1,136 @@
 # predict_upcoming.py
-# Predicts upcoming matches using model.pkl and secure .env or GitHub Secrets
+# Predicts upcoming matches using the trained model and secure .env or GitHub Secrets
 
+import argparse
+import asyncio
 import json
-import requests
-import pandas as pd
-import joblib
+import logging
+import time
 from datetime import datetime
 import os
-from dotenv import load_dotenv
-from scipy.stats import poisson
 import numpy as np
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 
+from elo import EloEngine
+from form_engine import FORM_KEYS, RollingForm
+from poisson_model import (DEFAULT_FORM, DRAW_MASK, AWAY_WIN_MASK, HOME_WIN_MASK, MAX_GOALS,
+                           OUTCOMES, predict_from_form)
+import config
+import metrics
+from competitions import (DEFAULT_COMPETITION, add_competitions_argument, artifact_path,
+                          enabled_competitions, run_concurrently)
+from http_client import DEFAULT_TIMEOUT, get_client
+from log_config import add_log_level_argument, configure, get_logger
+from supabase_rest import UPSERT_CHUNK_SIZE, chunked, in_filter, select_rows, upsert_rows
+from teams import get_registry, normalize_team_name, report_unresolved
+from upload_manifest import MANIFEST_VERSION, UploadManifest, digest, file_digest, get_manifest
 
-# Try to load .env from project root
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-env_path = os.path.join(project_root, '.env')
 
+log = get_logger('predict')
 
-# Detect if running in GitHub Actions
-IN_GITHUB_ACTIONS = os.getenv("GITHUB_ACTIONS") == "true"
+# ====================
+# CONFIG (env vars are read through config.py when first needed)
+# ====================
+# Max Supabase requests in flight with --async
+ASYNC_CONCURRENCY = 8
 
-if IN_GITHUB_ACTIONS:
-    print("☁️ Running in GitHub Actions (using secrets directly)")
-else:
-    if os.path.exists(env_path):
-        load_dotenv(env_path)
-        print("✅ Loaded .env file (local development)")
-    else:
-        print("⚠️ No .env file found — running in unknown environment")
+# Unique key of a prediction row (bulk upserts merge on it)
+PREDICTION_KEY = ('home_team', 'away_team', 'date')
 
+# ====================
+# Per-Competition Form and ELO (loaded on first use)
+# ====================
+team_forms = {}       # competition -> team form dict
+elo_engines = {}      # competition -> EloEngine
+match_histories = {}  # competition -> finished-match DataFrame (for --model xgb features)
+
+def get_team_form(competition=DEFAULT_COMPETITION):
+    """Team form for a competition (written by calculate_form.py)"""
+    if competition not in team_forms:
+        path = artifact_path(competition, 'form')
+        try:
+            with metrics.stage('form_load'), open(path, 'r') as f:
+                team_forms[competition] = json.load(f)
+            log.debug("✅ Loaded team form data for %s", competition)
+        except FileNotFoundError:
+            log.error("❌ File '%s' not found. Run 'python calculate_form.py --competition %s' first.", path, competition)
+            team_forms[competition] = {}
+    return team_forms[competition]
+
+def get_elo_engine(competition=DEFAULT_COMPETITION):
+    """ELO ratings for a competition (saved by train_model.py, updated by fetch_matches.py)"""
+    if competition not in elo_engines:
+        path = artifact_path(competition, 'elo')
+        try:
+            with metrics.stage('elo_load'):
+                elo_engines[competition] = EloEngine.load(path)
+            log.debug("✅ Loaded ELO ratings for %s", competition)
+        except FileNotFoundError:
+            log.warning("⚠️ File '%s' not found. Run 'python train_model.py --competition %s' first.", path, competition)
+            elo_engines[competition] = EloEngine()
+    return elo_engines[competition]
 
 # ====================
-# CONFIG (from .env or GitHub Secrets)
+# Team-ID Lookups for a Batch of Fixtures
 # ====================
-API_KEY = os.getenv("FOOTBALL_DATA_API_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-
-# Validate config
-if not API_KEY:
-    raise ValueError("❌ Missing FOOTBALL_DATA_API_KEY")
-if not SUPABASE_URL:
-    raise ValueError("❌ Missing SUPABASE_URL")
-if not SUPABASE_KEY:
-    raise ValueError("❌ Missing SUPABASE_ANON_KEY")
-
-print("✅ All environment variables loaded")
-
-# Validate config
-if not all([API_KEY, SUPABASE_URL, SUPABASE_KEY]):
-    raise ValueError("❌ Missing required environment variables in .env or GitHub Secrets")
-
-# Use the base URL from .env
-SUPABASE_REST_URL = f"{SUPABASE_URL}/rest/v1"
-
-HEADERS = {"X-Auth-Token": API_KEY}
-SUPABASE_HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json"
-}
-
-# Load trained model
-print("🧠 Loading AI model...")
-model = joblib.load('model.pkl')
-
-# Load team form data
-try:
-    with open('../data/team_form_2023.json', 'r') as f:
-        team_form = json.load(f)
-    print("✅ Loaded team form data")
-except FileNotFoundError:
-    print("❌ File '../data/team_form_2023.json' not found. Run 'python calculate_form.py' first.")
-    team_form = {}
-
-def normalize_team_name(name):
-    """Convert full API team name to short name used in team_form_2023.json"""
-    mapping = {
-        "Arsenal FC": "Arsenal",
-        "Aston Villa FC": "Aston Villa",
-        "AFC Bournemouth": "Bournemouth",
-        "Brentford FC": "Brentford",
-        "Brighton & Hove Albion FC": "Brighton",
-        "Burnley FC": "Burnley",
-        "Chelsea FC": "Chelsea",
-        "Crystal Palace FC": "Crystal Palace",
-        "Everton FC": "Everton",
-        "Fulham FC": "Fulham",
-        "Leeds United FC": "Leeds United",
-        "Leicester City FC": "Leicester",
-        "Liverpool FC": "Liverpool",
-        "Luton Town FC": "Luton",
-        "Manchester City FC": "Manchester City",
-        "Manchester United FC": "Manchester United",
-        "Newcastle United FC": "Newcastle",
-        "Nottingham Forest FC": "Nottingham Forest",
-        "Sheffield United FC": "Sheffield Utd",
-        "Southampton FC": "Southampton",
-        "Tottenham Hotspur FC": "Tottenham",
-        "West Ham United FC": "West Ham",
-        "Wolverhampton Wanderers FC": "Wolves",
-        "Sunderland AFC": "Sunderland"
-    }
-    return mapping.get(name, name)
+_form_tables = {}  # competition -> (team form dict, (n_teams + 1, 2) table by team ID, IDs with form)
+_elo_tables = {}   # competition -> (EloEngine, its version, (n_teams + 1, 1) ratings by team ID)
+
+def fixture_team_ids(matches):
+    """(home_ids, away_ids) registry IDs for fixtures, straight from the provider's names"""
+    registry = get_registry()
+    return (registry.ids([m['home_team'] for m in matches]),
+            registry.ids([m['away_team'] for m in matches]))
+
+def get_form_table(competition=DEFAULT_COMPETITION):
+    """goals_per_game / goals_conceded_per_game by team ID (DEFAULT_FORM for teams without form)"""
+    team_form = get_team_form(competition)
+    cached = _form_tables.get(competition)
+    if cached is None or cached[0] is not team_form:
+        registry = get_registry()
+        table = registry.table({team: (f['goals_per_game'], f['goals_conceded_per_game']) for team, f in team_form.items()},
+                               (DEFAULT_FORM['goals_per_game'], DEFAULT_FORM['goals_conceded_per_game']))
+        cached = _form_tables[competition] = (team_form, table, {registry.team_id(team) for team in team_form})
+    return cached[1], cached[2]
+
+def predict_fixture_form(matches, competition=DEFAULT_COMPETITION):
+    """Poisson predict_from_form() for fixtures, gathering team form by ID; also returns teams without form"""
+    registry = get_registry()
+    home_ids, away_ids = fixture_team_ids(matches)
+    table, with_form = get_form_table(competition)
+    home = registry.gather(table, home_ids)
+    away = registry.gather(table, away_ids)
+    missing = sorted({registry.name(tid) for tid in set(home_ids.tolist()) | set(away_ids.tolist())} -
+                     {registry.name(tid) for tid in with_form})
+    return predict_from_form(home[:, 0], home[:, 1], away[:, 0], away[:, 1]), missing
+
+def get_elo_table(competition=DEFAULT_COMPETITION):
+    """Current ratings by team ID (base rating for unrated teams); rebuilt only when the engine or its ratings change"""
+    elo_engine = get_elo_engine(competition)
+    cached = _elo_tables.get(competition)
+    if cached is None or cached[0] is not elo_engine or cached[1] != elo_engine.version:
+        table = get_registry().table(elo_engine.as_dict(), elo_engine.base_rating)
+        cached = _elo_tables[competition] = (elo_engine, elo_engine.version, table)
+    return cached[2]
+
+def get_fixture_elo(matches, competition=DEFAULT_COMPETITION):
+    """Return (home_elo, away_elo) arrays for all fixtures in one gather by team ID"""
+    registry = get_registry()
+    ratings = get_elo_table(competition)
+    home_ids, away_ids = fixture_team_ids(matches)
+    return registry.gather(ratings, home_ids)[:, 0], registry.gather(ratings, away_ids)[:, 0]
 
 # ====================
 # Fetch Upcoming Fixtures
 # ====================
-def fetch_upcoming_fixtures():
-    url = "https://api.football-data.org/v4/competitions/PL/matches?status=SCHEDULED"
-    response = requests.get(url, headers=HEADERS)
+@metrics.stage('fetch')
+def fetch_upcoming_fixtures(competition=DEFAULT_COMPETITION):
+    url = f"{config.football_data_url()}/competitions/{competition}/matches?status=SCHEDULED"
+    response = get_client().get(url, headers=config.football_data_headers(), cache=True)
     
     if response.status_code != 200:
-        print("❌ Error fetching fixtures:", response.text)
+        log.error("❌ Error fetching %s fixtures: %s %s", competition, response.status_code, response.text)
         return []
 
     data = response.json()
@@ -129,103 +146,192 @@ def fetch_upcoming_fixtures():
             'league': league_name
         })
     
-    print(f"✅ Fetched {len(matches)} upcoming matches")
+    log.info("✅ Fetched %d upcoming %s matches", len(matches), competition,
+             extra={'data': {'stage': 'fetch', 'competition': competition, 'matches': len(matches)}})
     return matches
 
 # ====================
 # Simulate Team Form & ELO for Prediction
 # ====================
-def predict_match(home_team, away_team):
-    print(f"\n🔍 Predicting: {home_team} vs {away_team}")
-
-    # Normalize names
-    home_key = normalize_team_name(home_team)
-    away_key = normalize_team_name(away_team)
-
-    # Get real form from saved data
-    home_form = team_form.get(home_key, {
-        'win_rate': 0.5, 'draw_rate': 0.2, 'loss_rate': 0.3,
-        'goals_per_game': 1.4, 'goals_conceded_per_game': 1.3
-    })
-    away_form = team_form.get(away_key, {
-        'win_rate': 0.5, 'draw_rate': 0.2, 'loss_rate': 0.3,
-        'goals_per_game': 1.4, 'goals_conceded_per_game': 1.3
-    })
-
-    # Log form data
-    print(f"  📊 {home_team} ({home_key}) form: {home_form['goals_per_game']:.2f} ⚽️, {home_form['goals_conceded_per_game']:.2f} 🛡️")
-    print(f"  📊 {away_team} ({away_key}) form: {away_form['goals_per_game']:.2f} ⚽️, {away_form['goals_conceded_per_game']:.2f} 🛡️")
-
-    # Estimate expected goals using form
-    baseline_home = 1.3
-    baseline_away = 1.1
-
-    lambda_home = baseline_home * (home_form['goals_per_game'] / 1.4) * (away_form['goals_conceded_per_game'] / 1.3)
-    lambda_away = baseline_away * (away_form['goals_per_game'] / 1.4) * (home_form['goals_conceded_per_game'] / 1.3)
-
-    lambda_home = np.clip(lambda_home, 0.3, 4.0)
-    lambda_away = np.clip(lambda_away, 0.3, 4.0)
-
-    print(f"  🎯 λ_home: {lambda_home:.2f}, λ_away: {lambda_away:.2f}")
-
-    # Build Poisson score matrix
-    max_goals = 5
-    home_probs = poisson.pmf(np.arange(0, max_goals + 1), lambda_home)
-    away_probs = poisson.pmf(np.arange(0, max_goals + 1), lambda_away)
-    score_matrix = np.outer(home_probs, away_probs)
-
-    # Find most likely score
-    best_home, best_away = np.unravel_index(score_matrix.argmax(), score_matrix.shape)
-    score_pred = f"{int(best_home)}-{int(best_away)}"
-    score_prob = score_matrix.max()
-
-    # Total outcome probabilities
-    p_home_win = np.sum(score_matrix * (np.arange(max_goals+1)[:, None] > np.arange(max_goals+1)))
-    p_away_win = np.sum(score_matrix * (np.arange(max_goals+1)[:, None] < np.arange(max_goals+1)))
-    p_draw = np.sum(score_matrix * (np.arange(max_goals+1)[:, None] == np.arange(max_goals+1)))
-
-    outcome_confidence = max(p_home_win, p_away_win, p_draw)
-    confidence = int(outcome_confidence * 100)
-
-    # Predict outcome
-    if best_home > best_away:
-        prediction = "Home Win"
-    elif best_home < best_away:
-        prediction = "Away Win"
-    else:
-        prediction = "Draw"
+# Teams already reported as missing from team_form (warn once, not per fixture)
+_missing_teams = set()
+
+@metrics.stage('predict')
+def predict_match(home_team, away_team, competition=DEFAULT_COMPETITION):
+    # Single-fixture batch through the same team-ID lookup, so results match predict_fixtures() exactly
+    r, missing = predict_fixture_form([{'home_team': home_team, 'away_team': away_team}], competition)
+
+    prediction = str(r['prediction'][0])
+    confidence = int(r['confidence'][0])
+    score_pred = r['score_pred'][0]
+    metrics.inc('fixtures_total', outcome='predicted', competition=competition)
+
+    registry = get_registry()
+    for name in (home_team, away_team):
+        key = registry.canonical(name)
+        if key in missing and (competition, key) not in _missing_teams:
+            _missing_teams.add((competition, key))
+            log.warning("⚠️ Team not found: '%s' → '%s' (using defaults)", name, key)
+
+    # Per-fixture detail only at debug level
+    if log.isEnabledFor(logging.DEBUG):
+        table, _ = get_form_table(competition)
+        log.debug("🔍 Predicting: %s vs %s", home_team, away_team)
+        for name in (home_team, away_team):
+            scored, conceded = registry.gather(table, registry.ids([name]))[0]
+            log.debug("  📊 %s (%s) form: %.2f ⚽️, %.2f 🛡️", name, registry.canonical(name), scored, conceded)
+        log.debug("  🎯 λ_home: %.2f, λ_away: %.2f", r['lambda_home'][0], r['lambda_away'][0])
+        log.debug("  📈 Outcome Prob: Home Win=%.2f, Draw=%.2f, Away Win=%.2f",
+                  r['p_home_win'][0], r['p_draw'][0], r['p_away_win'][0])
+        log.debug("  🎯 Most Likely Score: %s (prob=%.2f)", score_pred, r['score_prob'][0])
+        log.debug("  ✅ Final: %s → %s (%d%%)", prediction, score_pred, confidence)
 
-    if home_key not in team_form:
-        print(f"⚠️ Team not found: '{home_team}' → '{home_key}'")
-    if away_key not in team_form:
-        print(f"⚠️ Team not found: '{away_team}' → '{away_key}'")
+    return prediction, confidence, score_pred
 
-    print(f"  📈 Outcome Prob: Home Win={p_home_win:.2f}, Draw={p_draw:.2f}, Away Win={p_away_win:.2f}")
-    print(f"  🎯 Most Likely Score: {score_pred} (prob={score_prob:.2f})")
-    print(f"  ✅ Final: {prediction} → {score_pred} ({confidence}%)")
+# ====================
+# Predict All Fixtures in One Pass
+# ====================
+@metrics.stage('predict')
+def predict_fixtures(matches, competition=DEFAULT_COMPETITION):
+    """Vectorized predict_match for a list of fixtures; returns (prediction, confidence, score_pred) per fixture"""
+    if not matches:
+        return []
 
-    return prediction, confidence, score_pred
+    r, missing = predict_fixture_form(matches, competition)
+    if missing:
+        log.warning("⚠️ Teams not found in team form (using defaults): %s", ', '.join(missing))
+    metrics.inc('fixtures_total', len(matches), outcome='predicted', competition=competition)
+    log.info("🔮 Predicted %d %s fixtures", len(matches), competition,
+             extra={'data': {'stage': 'predict', 'competition': competition, 'fixtures': len(matches)}})
+
+    return list(zip(r['prediction'].tolist(), r['confidence'].tolist(), r['score_pred']))
 
 # ====================
-# Upload Prediction to Supabase
+# XGBoost Inference (model.npz, falling back to model.pkl)
 # ====================
-def upload_prediction(match, prediction, confidence, score_pred):
-    url = f"{SUPABASE_REST_URL}/predictions"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "resolution=merge-duplicates"
-    }
+_models = {}  # competition -> fitted model
+
+def get_model(competition=DEFAULT_COMPETITION):
+    """
+    Load a competition's trained model once, on first use: the flattened
+    NumPy ensemble train_model.py writes next to the pickle (no xgboost
+    import), or the joblib-pickled XGBClassifier when there is no export or
+    it was made from a different pickle than the one on disk.
+    """
+    if competition not in _models:
+        flat_path = artifact_path(competition, 'model_flat')
+        pkl_path = artifact_path(competition, 'model')
+        with metrics.stage('model_load'):
+            model = None
+            if os.path.exists(flat_path):
+                from tree_model import FlatForest
+                log.debug("🧠 Loading flattened model %s for %s...", flat_path, competition)
+                model = FlatForest.load(flat_path)
+                pkl_digest = file_digest(pkl_path)
+                if pkl_digest is not None and model.source_digest != pkl_digest:
+                    log.warning("⚠️ %s was not exported from the current %s; unpickling it instead "
+                                "(run 'python train_model.py --export-flat --competition %s')",
+                                flat_path, pkl_path, competition)
+                    model = None
+            else:
+                log.warning("⚠️ No %s; unpickling %s (run 'python train_model.py --export-flat --competition %s')",
+                            flat_path, pkl_path, competition)
+            if model is None:
+                import joblib
+                model = joblib.load(pkl_path)
+            _models[competition] = model
+    return _models[competition]
+
+def has_model(competition=DEFAULT_COMPETITION):
+    """Whether get_model() has a model to load for `competition`"""
+    return (competition in _models or os.path.exists(artifact_path(competition, 'model_flat'))
+            or os.path.exists(artifact_path(competition, 'model')))
+
+_rolling_form_tables = {}  # competition -> (fixture history DataFrame, last-5 form table by team ID)
+
+def get_rolling_form_table(competition=DEFAULT_COMPETITION):
+    """Last-5 form by team ID at the end of the fixture history; replayed once per loaded history"""
+    import match_store
+
+    df = match_histories.get(competition)
+    if df is None:
+        df = match_histories[competition] = match_store.load_match_data(artifact_path(competition, 'fixtures'))
+    cached = _rolling_form_tables.get(competition)
+    if cached is None or cached[0] is not df:
+        history = RollingForm()
+        if not df.empty:  # no history yet: every team gets the default form
+            for home, away, hg, ag in zip(df['home_team'], df['away_team'], df['home_goals'], df['away_goals']):
+                history.push(home, away, hg, ag)
+        table = get_registry().table({team: history.form(team) for team in history.history}, (0.0,) * len(FORM_KEYS))
+        cached = _rolling_form_tables[competition] = (df, table)
+    return cached[1]
+
+def build_upcoming_features(matches, competition=DEFAULT_COMPETITION):
+    """
+    Feature matrix for upcoming fixtures, built exactly like
+    train_model.create_feature_dataset: last-5 form from the fixture history
+    plus the current ELO difference.
+    """
+    from features import feature_frame
+
+    registry = get_registry()
+    form_table = get_rolling_form_table(competition)
+    home_ids, away_ids = fixture_team_ids(matches)
+    home_form = registry.gather(form_table, home_ids)
+    away_form = registry.gather(form_table, away_ids)
+    home_elo, away_elo = get_fixture_elo(matches, competition)
+
+    return feature_frame(home_form, away_form, home_elo - away_elo)
+
+@metrics.stage('predict')
+def predict_fixtures_xgb(matches, blend=0.0, competition=DEFAULT_COMPETITION):
+    """
+    Score all fixtures with one predict_proba call. `blend` is the weight of
+    the (renormalized) Poisson outcome probabilities mixed into the model's.
+    The score is the most likely Poisson score for the chosen outcome.
+    Returns (prediction, confidence, score_pred) per fixture.
+    """
+    if not matches:
+        return []
 
-    # Normalize team names before sending to Supabase
-    home_team_norm = normalize_team_name(match['home_team'])
-    away_team_norm = normalize_team_name(match['away_team'])
+    X = build_upcoming_features(matches, competition)
+    model = get_model(competition)
 
-    payload = {
+    start = time.perf_counter()
+    probs = model.predict_proba(X)  # columns: 0=Home Win, 1=Draw, 2=Away Win
+    latency_ms = 1000 * (time.perf_counter() - start)
+    log.info("🤖 XGBoost scored %d fixtures in %.1f ms (%.3f ms/fixture)", len(matches), latency_ms,
+             latency_ms / len(matches), extra={'data': {'stage': 'predict', 'fixtures': len(matches), 'latency_ms': latency_ms}})
+
+    r, _ = predict_fixture_form(matches, competition)
+    if blend:
+        poisson_probs = np.column_stack([r['p_home_win'], r['p_draw'], r['p_away_win']])
+        poisson_probs /= poisson_probs.sum(axis=1, keepdims=True)
+        probs = (1 - blend) * probs + blend * poisson_probs
+
+    outcome = probs.argmax(axis=1)
+    confidence = (probs.max(axis=1) * 100).astype(int)
+    metrics.inc('fixtures_total', len(matches), outcome='predicted', competition=competition)
+
+    # Most likely score within the predicted outcome
+    masks = np.stack([HOME_WIN_MASK, DRAW_MASK, AWAY_WIN_MASK])[outcome]
+    best = (r['scores'] * masks).reshape(len(matches), -1).argmax(axis=1)
+    best_home, best_away = np.divmod(best, MAX_GOALS + 1)
+
+    return [
+        (str(OUTCOMES[o]), int(c), f"{h}-{a}")
+        for o, c, h, a in zip(outcome, confidence, best_home.tolist(), best_away.tolist())
+    ]
+
+# ====================
+# Upload Prediction to Supabase
+# ====================
+def build_prediction_payload(match, prediction, confidence, score_pred):
+    """Row written to the predictions table (team names normalized)"""
+    return {
         "league": match['league'],
-        "home_team": home_team_norm,
-        "away_team": away_team_norm,
+        "home_team": normalize_team_name(match['home_team']),
+        "away_team": normalize_team_name(match['away_team']),
         "date": match['date'][:10],
         "prediction": prediction,
         "score_pred": score_pred,
@@ -236,61 +342,359 @@ def upload_prediction(match, prediction, confidence, score_pred):
         "updated_at": datetime.now().isoformat()
     }
 
+@metrics.stage('upload')
+def upload_prediction(match, prediction, confidence, score_pred):
+    """Write one prediction (GET, then PATCH or POST). Returns 'created', 'updated' or 'failed'"""
+    rest_url = config.supabase_rest_url()
+    url = f"{rest_url}/predictions"
+    headers = config.supabase_headers(Prefer="resolution=merge-duplicates")
+
+    # Normalize team names before sending to Supabase
+    payload = build_prediction_payload(match, prediction, confidence, score_pred)
+    home_team_norm = payload['home_team']
+    away_team_norm = payload['away_team']
+
     # URL-encode for query
     home_team_encoded = quote(home_team_norm)
     away_team_encoded = quote(away_team_norm)
     date_encoded = quote(match['date'][:10])
 
-    check_url = f"{SUPABASE_REST_URL}/predictions?home_team=eq.{home_team_encoded}&away_team=eq.{away_team_encoded}&date=eq.{date_encoded}"
+    check_url = f"{rest_url}/predictions?home_team=eq.{home_team_encoded}&away_team=eq.{away_team_encoded}&date=eq.{date_encoded}"
 
-    print(f"\n🔍 Predicting: {match['home_team']} vs {match['away_team']}")
-    print(f"🌐 Check URL: {check_url}")
-    print(f"📡 Headers: {dict(headers)}")
-    print(f"📄 Payload: {payload}")
+    # Headers are never logged: they carry the API key
+    log.debug("🌐 Check URL: %s", check_url)
+    log.debug("📄 Payload: %s", payload)
 
     try:
-        response = requests.get(check_url, headers=headers, timeout=10)
-        print(f"🔍 GET Response: {response.status_code}")
-        print(f"📄 GET Body: {response.text}")
+        response = get_client().get(check_url, headers=headers, timeout=DEFAULT_TIMEOUT)
+        log.debug("🔍 GET Response: %s %s", response.status_code, response.text)
 
         if response.status_code == 200 and len(response.json()) > 0:
             record_id = response.json()[0]['id']
-            update_url = f"{SUPABASE_REST_URL}/predictions?id=eq.{record_id}"
-            print(f"✅ Record found: ID={record_id}")
-            print(f"🌐 Update URL: {update_url}")
+            update_url = f"{rest_url}/predictions?id=eq.{record_id}"
+            log.debug("✅ Record found: ID=%s", record_id)
 
-            response = requests.patch(update_url, json=payload, headers=headers, timeout=10)
-            print(f"🔧 PATCH Response: {response.status_code}")
-            print(f"📄 PATCH Body: {response.text}")
+            response = get_client().patch(update_url, json=payload, headers=headers, timeout=DEFAULT_TIMEOUT)
+            log.debug("🔧 PATCH Response: %s %s", response.status_code, response.text)
             action = "🔄 Updated"
+            status = "updated"
         else:
-            print("➡️  No record found. Creating new.")
-            print(f"🌐 POST URL: {url}")
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            print(f"➕ POST Response: {response.status_code}")
-            print(f"📄 POST Body: {response.text}")
+            log.debug("➡️  No record found. Creating new.")
+            response = get_client().post(url, json=payload, headers=headers, timeout=DEFAULT_TIMEOUT)
+            log.debug("➕ POST Response: %s %s", response.status_code, response.text)
             action = "➕ Created"
+            status = "created"
 
         if response.status_code in [200, 201, 204]:
-            print(f"✅ {action}: {match['home_team']} vs {match['away_team']} → {prediction} ({confidence}%)")
-        else:
-            print(f"❌ Upload failed: {response.status_code} {response.text}")
+            log.debug("✅ %s: %s vs %s → %s (%d%%)", action, match['home_team'], match['away_team'], prediction, confidence)
+            return status
+        log.error("❌ Upload failed for %s vs %s: %s %s", match['home_team'], match['away_team'],
+                  response.status_code, response.text)
 
     except Exception as e:
-        print(f"❌ Request failed: {type(e).__name__}: {e}")
+        log.error("❌ Request failed for %s vs %s: %s: %s", match['home_team'], match['away_team'], type(e).__name__, e)
+
+    return "failed"
+
+# ====================
+# Bulk Upload (Chunked Upserts)
+# ====================
+@metrics.stage('upload')
+def upload_predictions_bulk(predictions, chunk_size=UPSERT_CHUNK_SIZE, changes=None):
+    """
+    Upsert (match, prediction, confidence, score_pred) tuples in chunks keyed
+    on PREDICTION_KEY. A chunk that fails falls back to per-row
+    upload_prediction(). With `changes`, rows equal to the last upload are
+    left out. Returns created/updated/failed totals.
+    """
+    # One row per key: a single upsert must not touch the same row twice
+    by_key = {}
+    for item in predictions:
+        if changes is not None and changes.unchanged(item[0], item[1:]):
+            continue
+        payload = build_prediction_payload(*item)
+        by_key[tuple(payload[k] for k in PREDICTION_KEY)] = (item, payload)
+
+    rest_url, headers = config.supabase_rest_url(), config.supabase_headers()
+    totals = {"created": 0, "updated": 0, "failed": 0}
+    chunks = chunked(list(by_key.values()), chunk_size)
+
+    for i, chunk in enumerate(chunks, 1):
+        counts = {"created": 0, "updated": 0, "failed": 0}
+        rows = [payload for _, payload in chunk]
+        try:
+            # Keys that already exist tell created from updated
+            existing = select_rows(rest_url, headers, 'predictions', {
+                'select': ','.join(PREDICTION_KEY),
+                'date': in_filter(sorted({row['date'] for row in rows}))
+            })
+            existing_keys = {tuple(r[k] for k in PREDICTION_KEY) for r in existing}
+
+            upsert_rows(rest_url, headers, 'predictions', rows, PREDICTION_KEY)
+
+            for row in rows:
+                if tuple(row[k] for k in PREDICTION_KEY) in existing_keys:
+                    counts["updated"] += 1
+                else:
+                    counts["created"] += 1
+            if changes is not None:
+                for item, _ in chunk:
+                    changes.uploaded(item[0], item[1:])
+        except Exception as e:
+            log.warning("⚠️ Chunk %d/%d upsert failed (%s: %s), falling back to per-row writes",
+                        i, len(chunks), type(e).__name__, e)
+            for item, _ in chunk:
+                status = upload_prediction(*item)
+                counts[status] += 1
+                if changes is not None and status != "failed":
+                    changes.uploaded(item[0], item[1:])
+
+        log.debug("📦 Chunk %d/%d: %d created, %d updated, %d failed",
+                  i, len(chunks), counts['created'], counts['updated'], counts['failed'])
+        for k in totals:
+            totals[k] += counts[k]
+
+    log.debug("📊 Upload totals: %d created, %d updated, %d failed", totals['created'], totals['updated'], totals['failed'])
+    return totals
+
+# ====================
+# Change Detection (upload manifest)
+# ====================
+def model_inputs(competition, args):
+    """Inputs shared by every fixture of a run: predictor, and for xgb the model weights and fixture history"""
+    inputs = {'version': MANIFEST_VERSION, 'model': args.model}
+    if args.model == 'xgb':
+        inputs.update(blend=args.blend, weights=[file_digest(artifact_path(competition, 'model_flat')),
+                                                 file_digest(artifact_path(competition, 'model'))],
+                      history=file_digest(artifact_path(competition, 'fixtures')))
+    return inputs
+
+class FixtureChanges:
+    """
+    One competition's run checked against the upload manifest. select()
+    keeps fixtures whose inputs hash changed, unchanged() drops a prediction
+    whose row equals the one last uploaded, uploaded() records a written row.
+    With force, every fixture is predicted and uploaded (and still recorded).
+    """
+
+    def __init__(self, competition, args, force=False, manifest=None):
+        self.competition = competition
+        self.args = args
+        self.force = force
+        self.manifest = manifest or get_manifest()
+        self.inputs = {}  # fixture key -> inputs hash
+        self.same_inputs = 0
+        self.same_rows = 0
+
+    @property
+    def skipped(self):
+        return self.same_inputs + self.same_rows
+
+    @staticmethod
+    def fixture_key(match):
+        return UploadManifest.key(normalize_team_name(match['home_team']), normalize_team_name(match['away_team']),
+                                  match['date'][:10])
+
+    def select(self, matches):
+        """Fixtures to predict: those whose form, ELO (xgb), model or date changed since the last upload"""
+        registry = get_registry()
+        form = {registry.team_id(team): digest(f) for team, f in get_team_form(self.competition).items()}
+        home_ids, away_ids = fixture_team_ids(matches)
+        elo = get_fixture_elo(matches, self.competition) if self.args.model == 'xgb' else None
+        shared = model_inputs(self.competition, self.args)
+
+        pending = []
+        for i, match in enumerate(matches):
+            home, away = int(home_ids[i]), int(away_ids[i])
+            inputs = {**shared, 'date': match['date'], 'league': match['league'],
+                      'home': registry.name(home), 'away': registry.name(away),
+                      'form': [form.get(home), form.get(away)]}
+            if elo is not None:
+                inputs['elo'] = [float(elo[0][i]), float(elo[1][i])]
+            key = self.fixture_key(match)
+            self.inputs[key] = digest(inputs)
+            if not self.force and self.manifest.inputs_unchanged(self.competition, key, self.inputs[key]):
+                self.same_inputs += 1
+            else:
+                pending.append(match)
+
+        if matches:  # a failed fetch returns nothing; don't forget every fixture because of it
+            self.manifest.prune(self.competition, self.inputs)
+        return pending
+
+    @staticmethod
+    def row_hash(match, prediction):
+        row = build_prediction_payload(match, *prediction)
+        del row['updated_at']
+        return digest(row)
+
+    def unchanged(self, match, prediction):
+        """True (and recorded against the new inputs) if this prediction's row is the one already uploaded"""
+        key, row = self.fixture_key(match), self.row_hash(match, prediction)
+        if self.force or not self.manifest.row_unchanged(self.competition, key, row):
+            return False
+        self.manifest.record(self.competition, key, self.inputs[key], row)
+        self.same_rows += 1
+        return True
+
+    def uploaded(self, match, prediction):
+        key = self.fixture_key(match)
+        self.manifest.record(self.competition, key, self.inputs[key], self.row_hash(match, prediction))
+
+# ====================
+# Serial and Async Pipelines
+# ====================
+def run_serial(matches, predictions=None, competition=DEFAULT_COMPETITION, changes=None):
+    """
+    Predict and upload one fixture at a time (or upload precomputed
+    predictions). Returns created/updated/failed counts.
+    """
+    counts = {"created": 0, "updated": 0, "failed": 0}
+    for i, match in enumerate(matches):
+        if predictions is None:
+            pred, conf, score = predict_match(match['home_team'], match['away_team'], competition)
+        else:
+            pred, conf, score = predictions[i]
+        if changes is not None and changes.unchanged(match, (pred, conf, score)):
+            continue
+        status = upload_prediction(match, pred, conf, score)
+        counts[status] += 1
+        if changes is not None and status != "failed":
+            changes.uploaded(match, (pred, conf, score))
+    return counts
+
+async def run_async(concurrency=ASYNC_CONCURRENCY, predict_batch=None, competition=DEFAULT_COMPETITION, changes=None):
+    """
+    Fetch, predict and upload as a pipeline: predictions run on the event
+    loop while up to `concurrency` uploads are in flight on worker threads.
+    `predict_batch` scores all fixtures up front instead of one at a time.
+    Returns the same counts as run_serial().
+    """
+    loop = asyncio.get_running_loop()
+    counts = {"created": 0, "updated": 0, "failed": 0}
+    limit = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        matches = await loop.run_in_executor(pool, fetch_upcoming_fixtures, competition)
+        if changes is not None:
+            matches = changes.select(matches)
+        predictions = predict_batch(matches) if predict_batch else None
+
+        async def upload(match, pred, conf, score):
+            try:
+                status = await loop.run_in_executor(pool, upload_prediction, match, pred, conf, score)
+            finally:
+                limit.release()
+            counts[status] += 1
+            if changes is not None and status != "failed":
+                changes.uploaded(match, (pred, conf, score))
+
+        tasks = []
+        for i, match in enumerate(matches):
+            # Back-pressure: don't predict further ahead than the upload slots allow
+            await limit.acquire()
+            if predictions is None:
+                pred, conf, score = predict_match(match['home_team'], match['away_team'], competition)
+            else:
+                pred, conf, score = predictions[i]
+            if changes is not None and changes.unchanged(match, (pred, conf, score)):
+                limit.release()
+                continue
+            tasks.append(asyncio.create_task(upload(match, pred, conf, score)))
+        await asyncio.gather(*tasks)
+
+    return counts
+
+def add_predict_arguments(parser):
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--batch', action='store_true',
+                      help="Upload with chunked bulk upserts instead of one GET + PATCH/POST per fixture")
+    mode.add_argument('--async', dest='use_async', action='store_true',
+                      help="Overlap predicting and uploading with concurrent requests")
+    parser.add_argument('--chunk-size', type=int, default=UPSERT_CHUNK_SIZE,
+                        help="Rows per bulk upsert (with --batch)")
+    parser.add_argument('--concurrency', type=int, default=ASYNC_CONCURRENCY,
+                        help="Max concurrent Supabase requests (with --async)")
+    parser.add_argument('--model', choices=['poisson', 'xgb'], default='poisson',
+                        help="Predictor: form-based Poisson (default) or the trained XGBoost model")
+    parser.add_argument('--blend', type=float, default=0.0,
+                        help="With --model xgb: weight of the Poisson probabilities in the blend (0-1)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-predict and re-upload every fixture, even if unchanged since the last upload")
+
+def run_competition(competition, args):
+    """Fetch, predict and upload one competition's fixtures in the mode chosen by `args`"""
+    predict_batch = None
+    use_xgb = args.model == 'xgb'
+    if use_xgb and not has_model(competition):
+        log.warning("⚠️ No trained model for %s; predicting its fixtures with the Poisson model", competition)
+        use_xgb = False
+    if use_xgb:
+        predict_batch = lambda matches: predict_fixtures_xgb(matches, blend=args.blend, competition=competition)
+    elif args.batch:
+        predict_batch = lambda matches: predict_fixtures(matches, competition)
+
+    changes = FixtureChanges(competition, args, force=args.force)
+    start = time.perf_counter()
+    if args.use_async:
+        log.debug("📅 Fetching upcoming %s fixtures (async, %d concurrent uploads)...", competition, args.concurrency)
+        counts = asyncio.run(run_async(args.concurrency, predict_batch, competition, changes))
+    else:
+        log.debug("📅 Fetching upcoming %s fixtures...", competition)
+        matches = changes.select(fetch_upcoming_fixtures(competition))
+        predictions = predict_batch(matches) if predict_batch else None
+
+        if args.batch:
+            rows = [(match, *pred) for match, pred in zip(matches, predictions)]
+            counts = upload_predictions_bulk(rows, chunk_size=args.chunk_size, changes=changes)
+        else:
+            counts = run_serial(matches, predictions, competition, changes)
+    counts['skipped'] = changes.skipped
+
+    elapsed = time.perf_counter() - start
+    for outcome, n in counts.items():
+        metrics.inc('fixtures_total', n, outcome=outcome, competition=competition)
+    log.info("📊 %s upload: %d created, %d updated, %d skipped (%d unchanged inputs, %d same prediction), "
+             "%d failed in %.2f s", competition, counts['created'], counts['updated'], counts['skipped'],
+             changes.same_inputs, changes.same_rows, counts['failed'], elapsed,
+             extra={'data': {'stage': 'upload', 'competition': competition, **counts, 'unchanged_inputs': changes.same_inputs,
+                             'same_prediction': changes.same_rows, 'seconds': round(elapsed, 3)}})
+    return counts
+
+def predict_all(competitions, args):
+    """Run every competition side by side (football-data.org calls share one rate limiter); returns the totals"""
+    start = time.perf_counter()
+    results = run_concurrently(competitions, lambda competition: run_competition(competition, args))
+
+    get_manifest().save()
+
+    failed = [competition for competition, counts in results.items() if counts is None]
+    totals = {k: sum(counts[k] for counts in results.values() if counts is not None)
+              for k in ("created", "updated", "skipped", "failed")}
+    elapsed = time.perf_counter() - start
+    log.info("📊 Upload: %d created, %d updated, %d skipped, %d failed across %d competitions in %.2f s",
+             totals['created'], totals['updated'], totals['skipped'], totals['failed'], len(competitions), elapsed,
+             extra={'data': {'stage': 'upload', **totals, 'competitions': competitions, 'failed_competitions': failed,
+                             'seconds': round(elapsed, 3)}})
+    if failed:
+        log.error("❌ %d of %d competitions failed: %s", len(failed), len(competitions), ', '.join(failed))
+    totals['failed_competitions'] = failed
+    return totals
 
 # ====================
 # Main
 # ====================
 if __name__ == "__main__":
-    print("🧠 Loading AI model...")
-    model = joblib.load('model.pkl')
-
-    print("📅 Fetching upcoming fixtures...")
-    matches = fetch_upcoming_fixtures()
-    
-    for match in matches:
-        pred, conf, score = predict_match(match['home_team'], match['away_team'])
-        upload_prediction(match, pred, conf, score)
-    
-    print("🚀 Predictions uploaded! Check your PWA.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Predict upcoming matches and upload them to Supabase")
+    add_predict_arguments(parser)
+    add_competitions_argument(parser)
+    add_log_level_argument(parser)
+    args = parser.parse_args()
+    configure(level=args.log_level)
+
+    predict_all(args.competitions or enabled_competitions(), args)
+    get_client().report()
+    report_unresolved()
+    prom_path, json_path = metrics.write_run_metrics('predict_upcoming')
+    log.info("📈 Metrics written to %s and %s", prom_path, json_path)
+    log.info("🚀 Predictions uploaded! Check your PWA.")
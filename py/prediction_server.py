@@ -0,0 +1,430 @@
+# prediction_server.py
+# Long-running HTTP prediction service. Team form, ELO ratings and the model
+# are loaded once (through predict_upcoming's caches) and reloaded when their
+# files change; computed predictions sit in an LRU keyed by matchup and data
+# version, so a hot matchup costs one dict lookup.
+#
+#   python prediction_server.py --port 8765
+#   curl 'http://127.0.0.1:8765/predict?home=Arsenal%20FC&away=Chelsea%20FC'
+#   curl -d '{"fixtures": [{"home_team": "Arsenal", "away_team": "Chelsea"}]}' http://127.0.0.1:8765/predict/batch
+#   python prediction_server.py --load-test --requests 20000 --concurrency 8
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+import predict_upcoming as pu
+from competitions import COMPETITIONS, DEFAULT_COMPETITION, artifact_path, parse_competitions
+from log_config import add_log_level_argument, configure, get_logger
+from teams import get_registry
+
+DEFAULT_PORT = 8765
+CACHE_SIZE = 50_000
+RELOAD_INTERVAL = 2.0  # seconds between checks of the data files
+MAX_BATCH = 1000
+# Files whose change invalidates a competition's loaded data
+WATCHED_ARTIFACTS = ('form', 'elo', 'fixtures', 'model_flat', 'model')
+
+log = get_logger('server')
+
+
+# ====================
+# LRU Cache
+# ====================
+class LRUCache:
+    """Thread-safe least-recently-used map with hit/miss counters"""
+
+    def __init__(self, capacity=CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self.entries), 'capacity': self.capacity, 'hits': self.hits,
+                    'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+# ====================
+# Data Versions and Hot Reload
+# ====================
+def _signature(competition):
+    """(path, mtime_ns, size) of every watched file that exists"""
+    signature = []
+    for kind in WATCHED_ARTIFACTS:
+        path = artifact_path(competition, kind)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+class DataWatcher:
+    """
+    Per-competition data version, bumped when a watched file changes. A bump
+    drops predict_upcoming's loaded form, ELO, history and model for that
+    competition; cache entries of the old version are never read again and
+    age out of the LRU.
+    """
+
+    def __init__(self, competitions, interval=RELOAD_INTERVAL):
+        self.interval = interval
+        self.signatures = {c: _signature(c) for c in competitions}
+        self.versions = {c: 1 for c in competitions}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def version(self, competition):
+        return self.versions[competition]
+
+    def check(self):
+        """Reload every competition whose files changed; returns the ones reloaded"""
+        reloaded = []
+        for competition, old in list(self.signatures.items()):
+            new = _signature(competition)
+            if new == old:
+                continue
+            with self.lock:
+                for cache in (pu.team_forms, pu.elo_engines, pu.match_histories, pu._models, pu._form_tables,
+                              pu._elo_tables, pu._rolling_form_tables):
+                    cache.pop(competition, None)
+                self.signatures[competition] = new
+                self.versions[competition] += 1
+            warm(competition)
+            reloaded.append(competition)
+            log.info("🔄 Reloaded %s data (version %d)", competition, self.versions[competition],
+                     extra={'data': {'stage': 'reload', 'competition': competition, 'version': self.versions[competition]}})
+        return reloaded
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # a half-written file: keep serving the old data, retry next tick
+                log.warning("⚠️ Reload failed (%s: %s); keeping the loaded data", type(e).__name__, e)
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def warm(competition):
+    """Load form and ELO now rather than on the first request"""
+    pu.get_form_table(competition)
+    pu.get_elo_engine(competition)
+
+
+# ====================
+# Prediction
+# ====================
+class Predictor:
+    """predict_upcoming's batch scoring behind an LRU keyed by (competition, model, blend, version, home, away)"""
+
+    def __init__(self, watcher, cache):
+        self.watcher = watcher
+        self.cache = cache
+
+    def predict(self, competition, fixtures, model='poisson', blend=0.0, matrix=False):
+        """
+        One response dict per (home_team, away_team); only cache misses are
+        scored, in one vectorized call. Raises ValueError for team names the
+        registry doesn't know: they are never registered, so requests can't
+        grow the registry or the cache.
+        """
+        registry = get_registry()
+        ids = [(registry.resolve(h), registry.resolve(a)) for h, a in fixtures]
+        unknown = sorted({name for names, pair in zip(fixtures, ids) for name, tid in zip(names, pair) if tid is None})
+        if unknown:
+            raise ValueError(f"unknown team(s): {', '.join(unknown[:10])}{' ...' if len(unknown) > 10 else ''}")
+        version = self.watcher.version(competition)
+        keys = [(competition, model, blend, version, home, away) for home, away in ids]
+        results = [self.cache.get(key) for key in keys]
+
+        # Same matchup twice in one batch is scored once
+        misses = {}
+        for i, result in enumerate(results):
+            if result is None:
+                misses.setdefault(keys[i], i)
+        if misses:
+            matches = [{'home_team': registry.name(key[4]), 'away_team': registry.name(key[5])} for key in misses]
+            scored = dict(zip(misses, self._score(matches, competition, model, blend)))
+            for key, entry in scored.items():
+                self.cache.put(key, entry)
+            results = [scored[key] if result is None else result for key, result in zip(keys, results)]
+
+        return [self._response(entry, key, matrix) for entry, key in zip(results, keys)]
+
+    @staticmethod
+    def _score(matches, competition, model, blend):
+        r, missing = pu.predict_fixture_form(matches, competition)
+        if model == 'xgb':
+            picks = pu.predict_fixtures_xgb(matches, blend=blend, competition=competition)
+        else:
+            picks = zip(r['prediction'].tolist(), r['confidence'].tolist(), r['score_pred'])
+        missing = set(missing)
+        entries = []
+        for i, (prediction, confidence, score_pred) in enumerate(picks):
+            home, away = matches[i]['home_team'], matches[i]['away_team']
+            entry = {
+                'home_team': home,
+                'away_team': away,
+                'prediction': prediction,
+                'confidence': int(confidence),
+                'score_pred': score_pred,
+                'lambda_home': float(r['lambda_home'][i]),
+                'lambda_away': float(r['lambda_away'][i]),
+                'default_form': sorted({home, away} & missing),
+                'scores': r['scores'][i]  # Poisson score matrix (the score pick comes from it for both models)
+            }
+            if model == 'poisson':
+                entry.update({'p_home_win': float(r['p_home_win'][i]), 'p_draw': float(r['p_draw'][i]),
+                              'p_away_win': float(r['p_away_win'][i])})
+            entries.append(entry)
+        return entries
+
+    @staticmethod
+    def _response(entry, key, matrix):
+        competition, model, _, version = key[:4]
+        body = {k: v for k, v in entry.items() if k != 'scores'}
+        body.update({'competition': competition, 'model': model, 'data_version': version})
+        if matrix:
+            body['score_matrix'] = np.round(entry['scores'], 6).tolist()
+        return body
+
+
+# ====================
+# HTTP
+# ====================
+class Handler(BaseHTTPRequestHandler):
+    """GET /predict, POST /predict/batch, GET /health; JSON in and out"""
+    protocol_version = 'HTTP/1.1'  # keep-alive: load tests and the PWA reuse connections
+    disable_nagle_algorithm = True  # headers and body go out as separate writes; don't wait on the client's ACK
+    predictor = None
+    watcher = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _options(self, params):
+        competition = (params.get('competition') or DEFAULT_COMPETITION).upper()
+        if competition not in self.watcher.versions:
+            raise ValueError(f"competition must be one of {', '.join(self.watcher.versions)}")
+        model = params.get('model') or 'poisson'
+        if model not in ('poisson', 'xgb'):
+            raise ValueError("model must be 'poisson' or 'xgb'")
+        blend = float(params.get('blend') or 0.0)
+        if not 0.0 <= blend <= 1.0:
+            raise ValueError("blend must be between 0 and 1")
+        matrix = str(params.get('matrix', '')).lower() in ('1', 'true', 'yes')
+        return competition, model, blend, matrix
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        if parts.path == '/health':
+            return self._send(200, {'status': 'ok', 'data_versions': self.watcher.versions,
+                                    'cache': self.predictor.cache.stats()})
+        if parts.path != '/predict':
+            return self._send(404, {'error': f"no route {parts.path}"})
+        if not params.get('home') or not params.get('away'):
+            return self._send(400, {'error': "home and away are required"})
+        try:
+            competition, model, blend, matrix = self._options(params)
+            result = self.predictor.predict(competition, [(params['home'], params['away'])], model, blend, matrix)[0]
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+        except Exception as e:
+            log.error("❌ Prediction failed: %s: %s", type(e).__name__, e)
+            return self._send(500, {'error': type(e).__name__})
+        self._send(200, result)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/predict/batch':
+            return self._send(404, {'error': f"no route {self.path}"})
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            fixtures = [(f['home_team'], f['away_team']) for f in body.get('fixtures', [])]
+            if not fixtures or len(fixtures) > MAX_BATCH:
+                raise ValueError(f"fixtures must hold 1-{MAX_BATCH} {{home_team, away_team}} objects")
+            competition, model, blend, matrix = self._options(body)
+            results = self.predictor.predict(competition, fixtures, model, blend, matrix)
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {'error': str(e)})
+        except Exception as e:
+            log.error("❌ Batch prediction failed: %s: %s", type(e).__name__, e)
+            return self._send(500, {'error': type(e).__name__})
+        self._send(200, {'predictions': results})
+
+
+def start_server(port=DEFAULT_PORT, competitions=(DEFAULT_COMPETITION,), cache_size=CACHE_SIZE,
+                 reload_interval=RELOAD_INTERVAL, host='127.0.0.1'):
+    """Load data, start the reload watcher and serve in a background thread; returns (server, base_url)"""
+    watcher = DataWatcher(competitions, reload_interval)
+    for competition in competitions:
+        warm(competition)
+    watcher.start()
+    handler = type('PredictionHandler', (Handler,), {
+        'predictor': Predictor(watcher, LRUCache(cache_size)),
+        'watcher': watcher
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ====================
+# Load Test
+# ====================
+def load_test(base_url, requests=10000, concurrency=8, competition=DEFAULT_COMPETITION, batch_size=0, seed=42):
+    """
+    Hammer a running server with random matchups of the competition's teams
+    over keep-alive connections. batch_size > 0 posts batches instead of
+    single GETs. Returns throughput and latency percentiles.
+    """
+    teams = sorted(pu.get_team_form(competition)) or ['Arsenal', 'Chelsea']
+    rng = random.Random(seed)
+    host = urlsplit(base_url).netloc
+    per_worker = requests // concurrency
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(w):
+        conn = http.client.HTTPConnection(host, timeout=30)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for _ in range(per_worker):
+            home, away = rng.sample(teams, 2)
+            fixtures = [dict(zip(('home_team', 'away_team'), rng.sample(teams, 2))) for _ in range(batch_size)]
+            start = time.perf_counter()
+            if batch_size:
+                conn.request('POST', '/predict/batch', json.dumps({'competition': competition, 'fixtures': fixtures}),
+                             {'Content-Type': 'application/json'})
+            else:
+                conn.request('GET', f"/predict?competition={competition}&home={home.replace(' ', '%20')}&away={away.replace(' ', '%20')}")
+            response = conn.getresponse()
+            response.read()
+            latencies[w].append(time.perf_counter() - start)
+            errors[w] += response.status != 200
+        conn.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat = np.array([x for worker_lat in latencies for x in worker_lat]) * 1000
+    done = len(lat)
+    return {
+        'requests': done,
+        'fixtures': done * (batch_size or 1),
+        'errors': sum(errors),
+        'seconds': elapsed,
+        'requests_per_second': done / elapsed,
+        'fixtures_per_second': done * (batch_size or 1) / elapsed,
+        'p50_ms': float(np.percentile(lat, 50)),
+        'p95_ms': float(np.percentile(lat, 95)),
+        'p99_ms': float(np.percentile(lat, 99))
+    }
+
+
+# ====================
+# Main
+# ====================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve match predictions over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--competitions', default=DEFAULT_COMPETITION,
+                        help=f"Comma-separated codes to serve ({', '.join(COMPETITIONS)})")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="Predictions kept in the LRU")
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL,
+                        help="Seconds between checks for changed form/model files")
+    parser.add_argument('--load-test', action='store_true', help="Start a server on a free port and load-test it")
+    parser.add_argument('--url', help="With --load-test: hit this running server instead")
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=0, help="With --load-test: fixtures per POST (0: single GETs)")
+    add_log_level_argument(parser)
+    args = parser.parse_args()
+    configure(level=args.log_level or ('WARNING' if args.load_test else None))
+
+    competitions = parse_competitions(args.competitions)
+
+    if args.load_test:
+        server = None
+        base_url = args.url
+        if not base_url:
+            server, base_url = start_server(0, competitions, args.cache_size, args.reload_interval)
+        report = load_test(base_url, args.requests, args.concurrency, competitions[0], args.batch_size)
+        print(f"🏋️ {report['requests']} requests ({report['fixtures']} fixtures) in {report['seconds']:.2f} s: "
+              f"{report['requests_per_second']:,.0f} req/s, {report['fixtures_per_second']:,.0f} fixtures/s, "
+              f"p50 {report['p50_ms']:.2f} ms, p95 {report['p95_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, "
+              f"{report['errors']} errors")
+        if server:
+            print(f"🗃️ Cache: {server.RequestHandlerClass.predictor.cache.stats()}")
+            server.shutdown()
+        raise SystemExit(1 if report['errors'] else 0)
+
+    server, base_url = start_server(args.port, competitions, args.cache_size, args.reload_interval, args.host)
+    log.info("🚀 Prediction server on %s (GET /predict?home=&away=, POST /predict/batch, GET /health)", base_url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
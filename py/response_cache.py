@@ -0,0 +1,119 @@
+# response_cache.py
+# On-disk cache of GET responses keyed by URL: fresh entries are served
+# without a request, stale ones are revalidated with ETag/Last-Modified,
+# and the directory is kept under a size limit by LRU eviction.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", '../data/cache/http')
+# Seconds a stored response is served without asking the server
+DEFAULT_TTL = float(os.getenv("HTTP_CACHE_TTL", "600"))
+MAX_CACHE_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Response headers kept with the body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def cache_key(url):
+    return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    """Stored GET responses (status 200 only) under `cache_dir`, at most `max_bytes` in total"""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, f"{cache_key(url)}.json")
+
+    def get(self, url):
+        """Stored entry for `url` ({url, stored_at, headers, body}) or None"""
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        if entry.get('url') != url:  # hash collision or a foreign file
+            return None
+        os.utime(path)  # mark as recently used for eviction
+        return entry
+
+    def is_fresh(self, entry, ttl=None):
+        return time.time() - entry['stored_at'] < (self.ttl if ttl is None else ttl)
+
+    @staticmethod
+    def validators(entry):
+        """Conditional request headers for a stored entry (empty if the server sent no validators)"""
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def put(self, url, headers, body):
+        """Store a 200 response body (text) and its validators, then evict over max_bytes"""
+        entry = {
+            'url': url,
+            'stored_at': time.time(),
+            'headers': {k: headers[k] for k in STORED_HEADERS if headers.get(k)},
+            'body': body
+        }
+        self._write(url, entry)
+        return entry
+
+    def touch(self, url, entry):
+        """The server confirmed (304) a stored entry is current: restart its TTL"""
+        entry['stored_at'] = time.time()
+        self._write(url, entry)
+
+    def _write(self, url, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self.lock:
+            self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits in max_bytes. Returns files removed"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,212 @@
+# season_sim.py
+# Monte Carlo of the rest of a season on the Poisson goal model. Every
+# remaining fixture's goals are drawn from the same lambdas predict_match
+# uses, a whole batch of seasons at a time as (simulations, fixtures) arrays;
+# each simulated final table is ranked on points, goal difference and goals
+# scored, giving every team's probability of finishing in each position.
+#
+#   python season_sim.py --competition PL --simulations 100000
+#   python season_sim.py --fixtures remaining.json --table table.json --workers 4 --out sim.json
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from competitions import DEFAULT_COMPETITION, competition_code
+from log_config import add_log_level_argument, configure, get_logger
+from teams import get_registry
+
+SIMULATIONS = 100_000
+# Seasons simulated per batch (memory is about 100 bytes per season per fixture)
+CHUNK_SIZE = 5_000
+
+log = get_logger('season_sim')
+
+
+# ====================
+# Current Table and Remaining Fixtures
+# ====================
+def fetch_finished_results(competition=DEFAULT_COMPETITION):
+    """This season's finished matches from football-data.org as (home, away, home_goals, away_goals)"""
+    import config
+    from http_client import get_client
+
+    url = f"{config.football_data_url()}/competitions/{competition}/matches?status=FINISHED"
+    response = get_client().get(url, headers=config.football_data_headers(), cache=True)
+    if response.status_code != 200:
+        raise RuntimeError(f"❌ Error fetching {competition} results: {response.status_code} {response.text}")
+    return [(m['homeTeam']['name'], m['awayTeam']['name'], m['score']['fullTime']['home'], m['score']['fullTime']['away'])
+            for m in response.json()['matches'] if m['status'] == 'FINISHED']
+
+
+def table_from_results(results):
+    """{team: [points, goal difference, goals scored]} from (home, away, home_goals, away_goals) results"""
+    table = {}
+    for home, away, home_goals, away_goals in results:
+        for team, scored, conceded in ((home, home_goals, away_goals), (away, away_goals, home_goals)):
+            row = table.setdefault(team, [0, 0, 0])
+            row[0] += 3 if scored > conceded else int(scored == conceded)
+            row[1] += scored - conceded
+            row[2] += scored
+    return table
+
+
+def load_table(path):
+    """Table from JSON: {team: points} or {team: {points, goal_difference, goals_for}}"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {team: [row, 0, 0] if isinstance(row, (int, float)) else
+            [row['points'], row.get('goal_difference', 0), row.get('goals_for', 0)]
+            for team, row in data.items()}
+
+
+def load_fixtures(path):
+    """Remaining fixtures from JSON: a list of {home_team, away_team, ...}"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def build_season(fixtures, table, competition=DEFAULT_COMPETITION):
+    """
+    Team names, the current table as a (teams, 3) array, and per fixture the
+    home/away team columns and Poisson lambdas. Teams are matched by registry
+    ID, so the table and fixtures may use different provider spellings.
+    """
+    import predict_upcoming
+
+    registry = get_registry()
+    columns = {}  # registry id -> column
+
+    def column(name):
+        return columns.setdefault(registry.team_id(name), len(columns))
+
+    rows = [(column(team), row) for team, row in table.items()]
+    home = np.array([column(m['home_team']) for m in fixtures], dtype=np.intp)
+    away = np.array([column(m['away_team']) for m in fixtures], dtype=np.intp)
+    base = np.zeros((len(columns), 3))
+    for col, row in rows:
+        base[col] += row
+
+    if fixtures:
+        r, missing = predict_upcoming.predict_fixture_form(fixtures, competition)
+        if missing:
+            log.warning("⚠️ Teams not found in team form (using defaults): %s", ', '.join(missing))
+        lambda_home, lambda_away = r['lambda_home'], r['lambda_away']
+    else:
+        lambda_home = lambda_away = np.zeros(0)
+
+    names = [registry.name(tid) for tid in columns]
+    return names, base, home, away, lambda_home, lambda_away
+
+
+# ====================
+# Simulation
+# ====================
+def simulate_chunk(seed, n, base, home, away, lambda_home, lambda_away):
+    """Position counts (teams, positions) and summed final points over `n` seasons drawn from `seed`"""
+    rng = np.random.default_rng(seed)
+    n_teams = len(base)
+    home_goals = rng.poisson(lambda_home, size=(n, len(lambda_home))).astype(np.float32)
+    away_goals = rng.poisson(lambda_away, size=(n, len(lambda_away))).astype(np.float32)
+
+    # Fixture -> team incidence, so one matmul adds every fixture to both teams' totals
+    at_home = np.zeros((len(home), n_teams), dtype=np.float32)
+    at_home[np.arange(len(home)), home] = 1
+    away_from_home = np.zeros_like(at_home)
+    away_from_home[np.arange(len(away)), away] = 1
+
+    margin = home_goals - away_goals
+    wins = 3 * ((margin > 0).astype(np.float32) @ at_home + (margin < 0).astype(np.float32) @ away_from_home)
+    draws = (margin == 0).astype(np.float32) @ (at_home + away_from_home)
+    points = base[:, 0] + wins + draws
+    goal_difference = base[:, 1] + margin @ (at_home - away_from_home)
+    goals_for = base[:, 2] + home_goals @ at_home + away_goals @ away_from_home
+
+    # Rank on points, then goal difference, then goals scored; a random fraction breaks exact ties
+    key = (points * 1000 + goal_difference + 500) * 1000 + goals_for + rng.random((n, n_teams))
+    order = np.argsort(-key, axis=1)  # order[s, k]: team finishing k-th in season s
+    counts = np.bincount((order * n_teams + np.arange(n_teams)).ravel(), minlength=n_teams * n_teams)
+    return counts.reshape(n_teams, n_teams), points.sum(axis=0)
+
+
+def simulate(base, home, away, lambda_home, lambda_away, simulations=SIMULATIONS, workers=1, seed=None,
+             chunk_size=CHUNK_SIZE):
+    """
+    (teams, positions) finishing-position probabilities and expected final
+    points. Chunks get independent streams from one SeedSequence, so a seed
+    gives the same result for any number of workers.
+    """
+    sizes = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, n, base, home, away, lambda_home, lambda_away) for s, n in zip(seeds, sizes)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(simulate_chunk, *zip(*jobs)))
+    else:
+        parts = [simulate_chunk(*job) for job in jobs]
+
+    counts = sum(p[0] for p in parts)
+    points = sum(p[1] for p in parts)
+    return counts / simulations, points / simulations
+
+
+def position_report(names, probs, expected_points):
+    """One row per team, best expected finish first"""
+    expected_position = probs @ np.arange(1, len(names) + 1)
+    return [{
+        'team': names[i],
+        'expected_points': round(float(expected_points[i]), 2),
+        'expected_position': round(float(expected_position[i]), 2),
+        'positions': [round(float(p), 5) for p in probs[i]]
+    } for i in np.argsort(expected_position)]
+
+
+# ====================
+# Main
+# ====================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the rest of a season: each team's finishing-position probabilities")
+    parser.add_argument('--competition', type=competition_code, default=DEFAULT_COMPETITION)
+    parser.add_argument('--fixtures', help="JSON list of remaining fixtures (default: fetch SCHEDULED matches)")
+    parser.add_argument('--table', help="JSON current table, {team: points} or {team: {points, goal_difference, goals_for}} "
+                                        "(default: this season's FINISHED matches)")
+    parser.add_argument('--simulations', type=int, default=SIMULATIONS)
+    parser.add_argument('--workers', type=int, default=1, help="Processes to split the simulations across")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Seasons simulated per batch")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--out', help="Also write the report to this JSON file")
+    add_log_level_argument(parser)
+    args = parser.parse_args()
+    configure(level=args.log_level)
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        from predict_upcoming import fetch_upcoming_fixtures
+        fixtures = fetch_upcoming_fixtures(args.competition)
+    table = load_table(args.table) if args.table else table_from_results(fetch_finished_results(args.competition))
+    names, base, home, away, lambda_home, lambda_away = build_season(fixtures, table, args.competition)
+
+    start = time.perf_counter()
+    probs, expected_points = simulate(base, home, away, lambda_home, lambda_away, args.simulations,
+                                      args.workers, args.seed, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    log.info("🎲 Simulated %d seasons of %d fixtures in %.2f s (%d worker%s)", args.simulations, len(fixtures),
+             elapsed, args.workers, '' if args.workers == 1 else 's',
+             extra={'data': {'stage': 'simulate', 'simulations': args.simulations, 'fixtures': len(fixtures),
+                             'workers': args.workers, 'seconds': round(elapsed, 3)}})
+
+    report = position_report(names, probs, expected_points)
+    print(f"{'Team':<28}{'xPts':>7}{'xPos':>6}{'1st':>8}{'Top 4':>8}{'Bottom 3':>10}")
+    for row in report:
+        p = row['positions']
+        print(f"{row['team']:<28}{row['expected_points']:>7.1f}{row['expected_position']:>6.1f}"
+              f"{p[0]:>8.1%}{sum(p[:4]):>8.1%}{sum(p[-3:]):>10.1%}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'competition': args.competition, 'simulations': args.simulations, 'teams': report}, f, indent=2)
+        print(f"💾 Report saved to {args.out}")
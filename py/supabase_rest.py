@@ -0,0 +1,44 @@
+# supabase_rest.py
+# Small helpers for Supabase's PostgREST API (filtered selects, bulk upserts)
+
+from http_client import DEFAULT_TIMEOUT, get_client
+
+# Rows per bulk upsert; each chunk costs two requests (select existing keys, then upsert),
+# so a 350-fixture upload is 2 chunks and 4 requests
+UPSERT_CHUNK_SIZE = 200
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most `size` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def in_filter(values):
+    """PostgREST `in` filter value, e.g. in.("a","b")"""
+    quoted = ','.join('"' + str(v).replace('"', '\\"') + '"' for v in values)
+    return f"in.({quoted})"
+
+
+def select_rows(rest_url, headers, table, params, timeout=DEFAULT_TIMEOUT):
+    """GET rows from `table` matching PostgREST filters in `params`"""
+    response = get_client().get(f"{rest_url}/{table}", params=params, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def upsert_rows(rest_url, headers, table, rows, on_conflict, timeout=DEFAULT_TIMEOUT):
+    """
+    Insert or update `rows` in one request, merging on the `on_conflict`
+    columns (which need a unique constraint). Returns the written rows.
+    """
+    upsert_headers = dict(headers)
+    upsert_headers['Prefer'] = "resolution=merge-duplicates,return=representation"
+    response = get_client().post(
+        f"{rest_url}/{table}",
+        params={'on_conflict': ','.join(on_conflict)},
+        json=rows,
+        headers=upsert_headers,
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json() if response.content else []
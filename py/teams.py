@@ -0,0 +1,183 @@
+# teams.py
+# Canonical team registry (data/teams.json): a stable integer ID and name per
+# club, plus one alias index built at load time that covers football-data.org
+# ("Wolverhampton Wanderers FC", "Man United") and API-Football ("Wolves")
+# spellings. Names the registry doesn't know get a run-local ID and are
+# reported, instead of silently falling back to default form.
+#
+#   python teams.py                      # unresolved names in every competition's saved artifacts
+#   python teams.py --competitions PL --out unresolved.json
+
+import argparse
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from competitions import COMPETITIONS, artifact_path, parse_competitions
+from log_config import get_logger
+
+REGISTRY_FILE = '../data/teams.json'
+
+log = get_logger('teams')
+
+
+def fold(name):
+    """Loose alias key: case, '&' vs 'and', dots/apostrophes and extra spaces don't matter"""
+    name = name.casefold().replace('&', ' and ')
+    name = re.sub(r"[.'’]", '', name)
+    return ' '.join(name.split())
+
+
+# ====================
+# Registry
+# ====================
+class TeamRegistry:
+    """Team IDs and canonical names; unknown names get IDs after the registered ones"""
+
+    def __init__(self, teams):
+        self.names = {}   # id -> canonical name
+        self.index = {}   # alias (exact) -> id
+        self.folded = {}  # fold(alias) -> id
+        for team in teams:
+            tid = int(team['id'])
+            if tid in self.names:
+                raise ValueError(f"❌ Duplicate team id {tid} in the registry")
+            self.names[tid] = team['name']
+            for alias in [team['name']] + team.get('aliases', []):
+                for index, key in ((self.index, alias), (self.folded, fold(alias))):
+                    if index.setdefault(key, tid) != tid:
+                        raise ValueError(f"❌ Alias '{alias}' maps to two teams in the registry")
+        self.registered = len(self.names)
+        self.next_id = max(self.names, default=-1) + 1
+        self.unresolved = {}  # name -> run-local id
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=REGISTRY_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['teams'])
+
+    def resolve(self, name):
+        """Registered ID of `name`, or None"""
+        tid = self.index.get(name)
+        if tid is None:
+            tid = self.folded.get(fold(name))
+        return tid
+
+    def team_id(self, name):
+        """ID of `name`; an unknown name gets a run-local ID (stable within this process) and is recorded"""
+        tid = self.resolve(name)
+        if tid is not None:
+            return tid
+        with self.lock:
+            tid = self.unresolved.get(name)
+            if tid is None:
+                tid = self.unresolved[name] = self.next_id
+                self.names[tid] = name
+                self.next_id += 1
+        return tid
+
+    def ids(self, names):
+        return np.fromiter((self.team_id(n) for n in names), dtype=np.int64, count=len(names))
+
+    def name(self, tid):
+        return self.names[tid]
+
+    def canonical(self, name):
+        """Registry name for any known spelling; unknown names come back unchanged"""
+        return self.names[self.team_id(name)]
+
+    def table(self, values, default):
+        """
+        Array indexed by team ID from a {name: value(s)} dict; the last row
+        holds `default`, so IDs with no entry (or -1) gather the default.
+        """
+        default = np.atleast_1d(np.asarray(default, dtype=float))
+        ids = [self.team_id(name) for name in values]
+        table = np.tile(default, (self.next_id + 1, 1))
+        if ids:
+            table[ids] = np.array([np.atleast_1d(v) for v in values.values()], dtype=float)
+        return table
+
+    @staticmethod
+    def gather(table, ids):
+        """Rows of `table` for `ids`; IDs registered after the table was built get the default row"""
+        ids = np.where(ids < len(table) - 1, ids, -1)
+        return table[ids]
+
+    def unresolved_names(self):
+        with self.lock:
+            return sorted(self.unresolved)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry, loaded on first use"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TeamRegistry.load()
+        return _registry
+
+
+def normalize_team_name(name):
+    """Canonical name for a provider's team name (unknown names pass through unchanged)"""
+    return get_registry().canonical(name)
+
+
+def report_unresolved():
+    """Log the names seen this run that the registry doesn't know (once, at the end of a run)"""
+    names = get_registry().unresolved_names()
+    if names:
+        log.warning("🏷️ %d team names not in %s: %s", len(names), REGISTRY_FILE, ', '.join(names),
+                    extra={'data': {'stage': 'teams', 'unresolved': names}})
+    return names
+
+
+# ====================
+# Artifact Scan
+# ====================
+def scan_competition(competition, registry=None):
+    """Unresolved team names in a competition's fixture history and team form files"""
+    import match_store
+
+    registry = registry or get_registry()
+    names = set()
+    path = artifact_path(competition, 'fixtures')
+    if os.path.exists(path):
+        store = match_store.open_store(path)
+        if store is not None:
+            names.update(store.teams)
+    path = artifact_path(competition, 'form')
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            names.update(json.load(f))
+    return sorted(n for n in names if registry.resolve(n) is None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report team names the registry can't resolve")
+    parser.add_argument('--competitions', type=parse_competitions, default=list(COMPETITIONS))
+    parser.add_argument('--out', help="Also write {competition: [names]} to this JSON file")
+    args = parser.parse_args()
+
+    registry = get_registry()
+    print(f"🏷️ Registry: {registry.registered} teams, {len(registry.index)} aliases")
+    report = {}
+    for competition in args.competitions:
+        unresolved = scan_competition(competition, registry)
+        if unresolved:
+            report[competition] = unresolved
+            print(f"⚠️ {competition}: {len(unresolved)} unresolved: {', '.join(unresolved)}")
+    if not report:
+        print("✅ Every saved team name resolves")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.out}")
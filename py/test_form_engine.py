@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import train_model
+from form_engine import FORM_KEYS, rolling_form_features
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', '2023_epl_fixtures.json')
+
+
+def test_rolling_form_matches_get_team_form():
+    train_model.DATA_FILE = DATA_FILE
+    df = train_model.load_match_data()
+    assert len(df) > 0
+
+    home_form, away_form = rolling_form_features(df, window=5)
+
+    for i, match in df.iterrows():
+        expected_home = train_model.get_team_form(match['home_team'], match['date'], df, window=5)
+        expected_away = train_model.get_team_form(match['away_team'], match['date'], df, window=5)
+        assert list(home_form[i]) == [expected_home[k] for k in FORM_KEYS], (i, match['home_team'])
+        assert list(away_form[i]) == [expected_away[k] for k in FORM_KEYS], (i, match['away_team'])
+
+    print(f"✅ Rolling form matches get_team_form on {len(df)} matches")
+
+
+def test_rolling_form_empty():
+    home_form, away_form = rolling_form_features(pd.DataFrame(
+        columns=['date', 'home_team', 'away_team', 'home_goals', 'away_goals']))
+    assert home_form.shape == (0, len(FORM_KEYS))
+    assert np.array_equal(home_form, away_form)
+
+
+if __name__ == "__main__":
+    test_rolling_form_matches_get_team_form()
+    test_rolling_form_empty()
@@ -0,0 +1,48 @@
+import numpy as np
+from xgboost import XGBClassifier
+
+from tree_model import FlatForest
+
+
+def fit_model(seed=0, n=600, n_features=6):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int) + (X[:, 2] > 1).astype(int)
+    X[rng.random(X.shape) < 0.1] = np.nan  # missing values take each split's default branch
+    model = XGBClassifier(n_estimators=50, max_depth=4, learning_rate=0.1, random_state=seed)
+    model.fit(X, y)
+    return model, X
+
+
+def test_flat_forest_matches_xgboost():
+    model, X = fit_model()
+    forest = FlatForest.from_booster(model.get_booster())
+
+    rng = np.random.default_rng(1)
+    X_new = rng.normal(size=(500, X.shape[1]))
+    X_new[rng.random(X_new.shape) < 0.2] = np.nan
+    X_new[0] = np.nan  # a row with every feature missing
+
+    for data in (X, X_new):
+        assert np.abs(forest.predict_proba(data) - model.predict_proba(data)).max() < 1e-5
+
+
+def test_flat_forest_save_load(tmp_path):
+    model, X = fit_model()
+    forest = FlatForest.from_booster(model.get_booster())
+    forest.source_digest = 'abc123'
+    path = tmp_path / 'model.npz'
+    forest.save(path)
+
+    loaded = FlatForest.load(path)
+    assert loaded.source_digest == 'abc123'
+    assert np.array_equal(loaded.predict_proba(X), forest.predict_proba(X))
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_flat_forest_matches_xgboost()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_flat_forest_save_load(Path(tmp))
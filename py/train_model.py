@@ -1,85 +1,77 @@
 # train_model.py
 # 60% Accuracy Model: ELO + XGBoost + Time-Based Validation
 
+import argparse
+import itertools
 import json
-import pandas as pd
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from xgboost import XGBClassifier
-from sklearn.metrics import accuracy_score
+from sklearn.metrics import accuracy_score, log_loss
 import joblib
 import re
 
+import match_store
+import feature_cache
+from tree_model import FlatForest
+from competitions import DEFAULT_COMPETITION, artifact_path, competition_code
+from form_engine import rolling_form_features
+from features import FEATURE_COLUMNS, feature_frame
+from elo import EloEngine, K_FACTOR
+from log_config import get_logger
+from upload_manifest import file_digest
+
 # ====================
 # CONFIG
 # ====================
-DATA_FILE = '../data/2023_epl_fixtures.json'
-MODEL_FILE = 'model.pkl'
+DATA_FILE = artifact_path(DEFAULT_COMPETITION, 'fixtures')
+MODEL_FILE = artifact_path(DEFAULT_COMPETITION, 'model')
+FLAT_MODEL_FILE = artifact_path(DEFAULT_COMPETITION, 'model_flat')
+ELO_STATE_FILE = artifact_path(DEFAULT_COMPETITION, 'elo')
+FORM_WINDOW = 5
+# Bump when create_feature_dataset changes in a way the config below doesn't capture
+FEATURE_VERSION = 2
+WALK_FORWARD_REPORT = 'walk_forward_report.json'
+
+# XGBoost parameters of the shipped model (best walk-forward log-loss on the 2023 EPL season)
+DEFAULT_PARAMS = {
+    'n_estimators': 100,
+    'learning_rate': 0.02,
+    'max_depth': 3,
+    'subsample': 0.8,
+    'colsample_bytree': 0.6
+}
+# Search space for walk-forward tuning
+PARAM_GRID = {
+    'n_estimators': [100, 200, 400],
+    'learning_rate': [0.02, 0.05, 0.1],
+    'max_depth': [2, 3, 5, 7],
+    'subsample': [0.7, 0.8, 1.0],
+    'colsample_bytree': [0.6, 0.8, 1.0]
+}
+
+log = get_logger('train')
 
 # ====================
-# Load and Parse Raw Data (Robust to Partial JSON)
+# Load and Parse Raw Data (Streaming, Robust to Partial JSON)
 # ====================
 def load_match_data():
-    """Load match data from potentially incomplete JSON"""
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Extract valid JSON object
-        start = content.find('{')
-        end = content.rfind('}') + 1
-        if start == -1 or end == 0:
-            print("❌ No valid JSON found")
-            return pd.DataFrame()
-
-        json_str = content[start:end]
-        data = json.loads(json_str)
-
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON decode error at position {e.pos}: {e.msg}")
-        return pd.DataFrame()
-    except Exception as e:
-        print(f"❌ Error reading file: {e}")
-        return pd.DataFrame()
-
-    if 'response' not in data:
-        print("⚠️ No 'response' in data")
-        return pd.DataFrame()
-
-    matches = []
-    for fixture in data['response']:
-        # Skip if not finished
-        status = fixture.get('fixture', {}).get('status', {}).get('long')
-        if status != "Match Finished":
-            continue
-
-        goals = fixture.get('goals', {})
-        home_goals = goals.get('home')
-        away_goals = goals.get('away')
-        if home_goals is None or away_goals is None:
-            continue
-
-        matches.append({
-            'date': fixture['fixture']['date'],
-            'home_team': fixture['teams']['home']['name'],
-            'away_team': fixture['teams']['away']['name'],
-            'home_goals': home_goals,
-            'away_goals': away_goals
-        })
-
-    df = pd.DataFrame(matches)
-    if df.empty:
-        print("❌ No valid matches loaded")
-        return df
-
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date').reset_index(drop=True)
-    print(f"✅ Loaded {len(df)} finished matches")
-    return df
+    """Load finished matches from DATA_FILE via the cached match store"""
+    return match_store.load_match_data(DATA_FILE)
 
 # ====================
 # Calculate Team Form (Last 5 Games) — Normalized
 # ====================
 def get_team_form(team, date, df, window=5):
-    """Get normalized form (rates per game) from last N games before `date`"""
+    """
+    Get normalized form (rates per game) from last N games before `date`.
+    Reference implementation: create_feature_dataset uses the single-pass
+    form_engine.rolling_form_features, which must stay equivalent to this.
+    """
     past_matches = df[df['date'] < date]
     team_matches = past_matches[
         (past_matches['home_team'] == team) | 
@@ -127,104 +119,98 @@ def get_team_form(team, date, df, window=5):
 # ====================
 # Calculate ELO Ratings Over Time
 # ====================
+def build_elo_engine(df, k_factor=K_FACTOR):
+    """Rate all matches once; the engine keeps pre-match and current ratings"""
+    engine = EloEngine(k_factor=k_factor)
+    engine.fit(df)
+    return engine
+
 def calculate_elo_ratings(df):
     """Calculate running ELO ratings for all teams"""
-    elo = {team: 1500 for team in set(df['home_team']) | set(df['away_team'])}
-    k_factor = 30  # How much to adjust per game
-
-    for _, match in df.iterrows():
-        home_team = match['home_team']
-        away_team = match['away_team']
-        home_goals = match['home_goals']
-        away_goals = match['away_goals']
-
-        # Get current ratings
-        home_elo = elo[home_team]
-        away_elo = elo[away_team]
-
-        # Expected win probability
-        expected_home = 1 / (1 + 10 ** ((away_elo - home_elo) / 400))
-
-        # Actual result
-        if home_goals > away_goals:
-            result = 1.0  # Home win
-        elif home_goals < away_goals:
-            result = 0.0  # Away win
-        else:
-            result = 0.5  # Draw
-
-        # Update ELO
-        new_home = home_elo + k_factor * (result - expected_home)
-        new_away = away_elo + k_factor * ((1 - result) - (1 - expected_home))
-
-        elo[home_team] = new_home
-        elo[away_team] = new_away
-
-    return elo
+    return build_elo_engine(df).as_dict()
 
 # ====================
 # Generate Features for Each Match
 # ====================
-def create_feature_dataset(df):
-    """Add team form, ELO, and home advantage features"""
-    features = []
-    elo_ratings = calculate_elo_ratings(df)  # Final ELO after all matches
-
-    for idx, match in df.iterrows():
-        date = match['date']
-        home_team = match['home_team']
-        away_team = match['away_team']
-
-        home_form = get_team_form(home_team, date, df)
-        away_form = get_team_form(away_team, date, df)
-
-        # Outcome: 0=Home Win, 1=Draw, 2=Away Win
-        if match['home_goals'] > match['away_goals']:
-            outcome = 0
-        elif match['home_goals'] < match['away_goals']:
-            outcome = 2
-        else:
-            outcome = 1
-
-        features.append({
-            # Home team form
-            'home_win_rate': home_form['win_rate'],
-            'home_draw_rate': home_form['draw_rate'],
-            'home_goals_per_game': home_form['goals_per_game'],
-            'home_goals_conceded_per_game': home_form['goals_conceded_per_game'],
-
-            # Away team form
-            'away_win_rate': away_form['win_rate'],
-            'away_draw_rate': away_form['draw_rate'],
-            'away_goals_per_game': away_form['goals_per_game'],
-            'away_goals_conceded_per_game': away_form['goals_conceded_per_game'],
-
-            # ELO difference
-            'elo_diff': elo_ratings[home_team] - elo_ratings[away_team],
-
-            # Home advantage
-            'home_advantage': 1,
+def create_feature_dataset(df, window=FORM_WINDOW, k_factor=K_FACTOR, engine=None):
+    """
+    Add team form, ELO, and home advantage features (all as known before
+    each match). `engine` is an empty EloEngine to rate the matches with, so
+    the caller can keep its final state.
+    """
+    if engine is None:
+        engine = EloEngine(k_factor=k_factor)
+    # Each row's ratings before it was played, so no feature sees a later result
+    pre_home, pre_away = engine.fit(df)
+
+    # Pre-match form for every row in one pass (same as get_team_form per row)
+    home_form, away_form = rolling_form_features(df, window)
+
+    home_goals = df['home_goals'].to_numpy()
+    away_goals = df['away_goals'].to_numpy()
+
+    feature_df = feature_frame(home_form, away_form, pre_home - pre_away)
+
+    # Outcome: 0=Home Win, 1=Draw, 2=Away Win
+    feature_df['outcome'] = np.where(home_goals > away_goals, 0, np.where(home_goals < away_goals, 2, 1))
+    return feature_df
+
+def feature_config(window=FORM_WINDOW, k_factor=K_FACTOR):
+    """Everything besides the source data that determines the feature matrix"""
+    return {'window': window, 'k_factor': k_factor, 'features': FEATURE_COLUMNS, 'version': FEATURE_VERSION}
+
+def load_feature_dataset(df, window=FORM_WINDOW, k_factor=K_FACTOR, engine=None):
+    """
+    create_feature_dataset(df), served from the on-disk cache when the same
+    matches and config were seen before. `engine` is fitted on df either way.
+    """
+    key = feature_cache.cache_key(feature_cache.frame_hash(df), feature_config(window, k_factor))
+
+    feature_df = feature_cache.load(key)
+    if feature_df is not None:
+        log.info("🗃️ Feature cache hit (%s)", key)
+        if engine is not None:
+            engine.fit(df)
+        return feature_df
+
+    log.info("🗃️ Feature cache miss (%s); computing features...", key)
+    feature_df = create_feature_dataset(df, window, k_factor, engine)
+    evicted = feature_cache.save(key, feature_df)
+    if evicted:
+        log.info("🧹 Evicted %d old feature cache entries", evicted)
+    return feature_df
 
-            # Target
-            'outcome': outcome
-        })
-
-    return pd.DataFrame(features)
+# ====================
+# Flattened Model Export (what predict_upcoming loads)
+# ====================
+def export_flat_model(model=None):
+    """
+    Write FLAT_MODEL_FILE from a fitted model, or from the pickle in MODEL_FILE.
+    The pickle's digest is stored with it, so get_model can tell a stale export.
+    """
+    if model is None:
+        model = joblib.load(MODEL_FILE)
+    forest = FlatForest.from_booster(model.get_booster())
+    forest.source_digest = file_digest(MODEL_FILE)
+    forest.save(FLAT_MODEL_FILE)
+    log.info("💾 Flattened model saved to %s", FLAT_MODEL_FILE)
 
 # ====================
 # Train the Model
 # ====================
-def train_model():
-    print("📊 Loading match data...")
-    df = load_match_data()
+def train_model(params=None, df=None):
+    if df is None:
+        log.info("📊 Loading match data...")
+        df = load_match_data()
     if df.empty:
         return None
 
-    print("📈 Calculating team form and ELO features...")
-    feature_df = create_feature_dataset(df)
+    log.info("📈 Calculating team form and ELO features...")
+    elo_engine = EloEngine(k_factor=K_FACTOR)
+    feature_df = load_feature_dataset(df, engine=elo_engine)
 
     if len(feature_df) < 10:
-        print("❌ Not enough data to train")
+        log.error("❌ Not enough data to train")
         return None
 
     # ✅ Time-based split: train on first 300, test on last 80
@@ -237,40 +223,175 @@ def train_model():
     X_test = test_df.drop('outcome', axis=1)
     y_test = test_df['outcome']
 
-    print("🤖 Training XGBoost model...")
-    model = XGBClassifier(
-        n_estimators=200,
-        learning_rate=0.05,
-        max_depth=5,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        random_state=42
-    )
+    log.info("🤖 Training XGBoost model...")
+    model = XGBClassifier(**(params or DEFAULT_PARAMS), random_state=42)
     model.fit(X_train, y_train)
 
     # Evaluate
     y_pred = model.predict(X_test)
     accuracy = accuracy_score(y_test, y_pred)
-    print(f"🎯 Model Accuracy: {accuracy:.2f}")
+    log.info("🎯 Model Accuracy: %.2f", accuracy, extra={'data': {'stage': 'train', 'accuracy': float(accuracy)}})
 
     # Save model
     joblib.dump(model, MODEL_FILE)
-    print(f"💾 Model saved to {MODEL_FILE}")
+    log.info("💾 Model saved to %s", MODEL_FILE)
+    export_flat_model(model)
+
+    # Save ELO state (the engine that rated the features) so fetch_matches can apply new results incrementally
+    elo_engine.save(ELO_STATE_FILE)
+    log.info("💾 ELO state saved to %s", ELO_STATE_FILE)
 
     # Feature importance
-    print("\n🔍 Top 5 Most Important Features:")
     importances = model.feature_importances_
     feature_names = X_train.columns
     top5 = sorted(zip(feature_names, importances), key=lambda x: -x[1])[:5]
-    for name, imp in top5:
-        print(f"  {name}: {imp:.3f}")
+    log.info("🔍 Top 5 Most Important Features: %s", ', '.join(f"{name} {imp:.3f}" for name, imp in top5))
 
     return model
 
+# ====================
+# Walk-Forward Evaluation + Hyperparameter Search
+# ====================
+def walk_forward_folds(matchdays, min_train_matchdays=10):
+    """(train_idx, test_idx) per matchday: train on every earlier matchday, test on that one"""
+    folds = []
+    for md in np.unique(matchdays):
+        if md < min_train_matchdays:
+            continue
+        train_idx = np.flatnonzero(matchdays < md)
+        test_idx = np.flatnonzero(matchdays == md)
+        folds.append((int(md), train_idx, test_idx))
+    return folds
+
+def param_candidates(search='random', n_iter=20, seed=42):
+    """DEFAULT_PARAMS first, then the full PARAM_GRID or `n_iter` random draws from it"""
+    keys = list(PARAM_GRID)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*PARAM_GRID.values())]
+    if search == 'random':
+        grid = random.Random(seed).sample(grid, min(n_iter, len(grid)))
+    return [DEFAULT_PARAMS] + [p for p in grid if p != DEFAULT_PARAMS]
+
+# Worker-process globals, set once per process by _init_worker
+_X = None
+_y = None
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+def _run_fold(task):
+    """Fit one config on one fold (in a worker process) and score the held-out matchday"""
+    config_id, params, matchday, train_idx, test_idx = task
+    start = time.perf_counter()
+    # One thread per model: parallelism comes from running folds side by side
+    model = XGBClassifier(**params, random_state=42, n_jobs=1)
+    model.fit(_X[train_idx], _y[train_idx])
+    proba = model.predict_proba(_X[test_idx])
+    y_test = _y[test_idx]
+    hits = proba.argmax(axis=1) == y_test
+    return {
+        'config': config_id,
+        'matchday': matchday,
+        'n_train': len(train_idx),
+        'n_test': len(test_idx),
+        'correct': int(hits.sum()),
+        'accuracy': float(hits.mean()),
+        'log_loss': float(log_loss(y_test, proba, labels=[0, 1, 2])),
+        'fit_seconds': time.perf_counter() - start
+    }
+
+def walk_forward_search(search='random', n_iter=20, cpus=None, min_train_matchdays=10, report_file=WALK_FORWARD_REPORT):
+    """Score every candidate config on every walk-forward fold in a process pool; returns the report"""
+    df = load_match_data()
+    if df.empty:
+        return None
+    feature_df = load_feature_dataset(df)
+    X = feature_df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = feature_df['outcome'].to_numpy()
+
+    folds = walk_forward_folds(match_store.matchday_index(df['date']), min_train_matchdays)
+    candidates = param_candidates(search, n_iter)
+    cpus = cpus or os.cpu_count() or 1
+    tasks = [(i, params, md, train_idx, test_idx)
+             for i, params in enumerate(candidates)
+             for md, train_idx, test_idx in folds]
+    log.info("🔁 Walk-forward: %d configs × %d matchdays = %d fits on %d CPUs", len(candidates), len(folds), len(tasks), cpus)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=cpus, initializer=_init_worker, initargs=(X, y)) as pool:
+        results = list(pool.map(_run_fold, tasks, chunksize=max(1, len(tasks) // (cpus * 8))))
+    elapsed = time.perf_counter() - start
+
+    summary = []
+    for i, params in enumerate(candidates):
+        rows = [r for r in results if r['config'] == i]
+        n_test = sum(r['n_test'] for r in rows)
+        summary.append({
+            'config': i,
+            'params': params,
+            'accuracy': sum(r['correct'] for r in rows) / n_test,
+            # Pooled over every test match, not averaged per fold
+            'log_loss': sum(r['log_loss'] * r['n_test'] for r in rows) / n_test,
+            'fold_accuracy_std': float(np.std([r['accuracy'] for r in rows]))
+        })
+    summary.sort(key=lambda s: s['log_loss'])
+    best = summary[0]
+
+    report = {
+        'search': search,
+        'cpus': cpus,
+        'elapsed_seconds': elapsed,
+        'fits_per_second': len(tasks) / elapsed,
+        'matchdays': len(folds),
+        'min_train_matchdays': min_train_matchdays,
+        'best': best,
+        'configs': summary,
+        'folds': results
+    }
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = next(s for s in summary if s['config'] == 0)
+    log.info("⏱️ %d fits in %.1fs (%.1f fits/s)", len(tasks), elapsed, len(tasks) / elapsed)
+    log.info("📏 Default params: accuracy %.3f, log-loss %.4f", baseline['accuracy'], baseline['log_loss'])
+    log.info("🏆 Best params: accuracy %.3f, log-loss %.4f -> %s", best['accuracy'], best['log_loss'], best['params'])
+    log.info("💾 Walk-forward report saved to %s", report_file)
+    return report
+
+def use_competition(competition):
+    """Point DATA_FILE and the saved artifacts at one competition"""
+    global DATA_FILE, MODEL_FILE, FLAT_MODEL_FILE, ELO_STATE_FILE
+    DATA_FILE = artifact_path(competition, 'fixtures')
+    MODEL_FILE = artifact_path(competition, 'model')
+    FLAT_MODEL_FILE = artifact_path(competition, 'model_flat')
+    ELO_STATE_FILE = artifact_path(competition, 'elo')
+
 # ====================
 # Main
 # ====================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the XGBoost model or tune it with walk-forward validation")
+    parser.add_argument('--walk-forward', action='store_true', help="Evaluate configs matchday by matchday instead of training")
+    parser.add_argument('--search', choices=['grid', 'random'], default='random', help="Search PARAM_GRID exhaustively or by sampling")
+    parser.add_argument('--n-iter', type=int, default=20, help="Random-search draws (besides the default params)")
+    parser.add_argument('--cpus', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--min-train-matchdays', type=int, default=10, help="Matchdays of history before the first test fold")
+    parser.add_argument('--report', default=WALK_FORWARD_REPORT)
+    parser.add_argument('--export-flat', action='store_true', help="Only re-export the saved pickle as the flattened NumPy model")
+    parser.add_argument('--competition', type=competition_code, default=DEFAULT_COMPETITION,
+                        help="Which competition's fixtures to train on and artifacts to write")
+    args = parser.parse_args()
+
+    use_competition(args.competition)
+
+    if args.export_flat:
+        export_flat_model()
+        raise SystemExit(0)
+
+    if args.walk_forward:
+        walk_forward_search(args.search, args.n_iter, args.cpus, args.min_train_matchdays, args.report)
+        raise SystemExit(0)
+
     model = train_model()
     if model:
         print("🎉 60% Model Training Complete! Ready for predictions.")
@@ -0,0 +1,121 @@
+# tree_model.py
+# The trained XGBoost ensemble flattened into NumPy arrays (model.npz), so
+# predict_upcoming can score fixtures without importing xgboost or
+# unpickling a full XGBClassifier.
+
+import json
+
+import numpy as np
+
+
+class FlatForest:
+    """
+    All trees of a multi:softprob booster as flat node arrays. Leaves point
+    to themselves, so walking every tree max_depth steps lands on its leaf.
+    `source_digest` identifies the pickled model it was exported from.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, tree_class, base_margin, max_depth, feature_names, source_digest=''):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.tree_class = tree_class
+        self.base_margin = base_margin
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self.source_digest = str(source_digest)
+        # (n_trees, n_classes) one-hot: sums leaf values into class margins with one matmul
+        self._class_matrix = np.eye(len(base_margin), dtype=np.float64)[tree_class]
+        # Next node is _children[2 * node + went_left]: one gather per level instead of two plus a select
+        self._children = np.stack([right, left], axis=1).ravel().astype(np.int64)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Flatten a fitted xgboost Booster (multi:softprob, numerical splits only)"""
+        model = json.loads(booster.save_raw('json'))['learner']
+        if model['objective']['name'] != 'multi:softprob':
+            raise ValueError(f"❌ Can't flatten objective {model['objective']['name']}")
+        params = model['learner_model_param']
+        n_classes = int(params['num_class'])
+        base = np.array(json.loads(params['base_score']), dtype=np.float64).reshape(-1)
+        base_margin = np.broadcast_to(base, (n_classes,)).copy()  # softmax margins start from base_score as-is
+        gbtree = model['gradient_booster']['model']
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in gbtree['trees']:
+            if any(tree['split_type']):
+                raise ValueError("❌ Categorical splits are not supported")
+            lc = np.array(tree['left_children'], dtype=np.int64)
+            rc = np.array(tree['right_children'], dtype=np.int64)
+            n = len(lc)
+            leaf = lc == -1
+            own = np.arange(n)
+            left.append(np.where(leaf, own, lc) + offset)
+            right.append(np.where(leaf, own, rc) + offset)
+            feature.append(np.where(leaf, 0, tree['split_indices']))
+            threshold.append(np.where(leaf, 0.0, tree['split_conditions']))
+            value.append(np.where(leaf, tree['split_conditions'], 0.0))
+            default_left.append(np.array(tree['default_left'], dtype=bool))
+            roots.append(offset)
+
+            depth = np.zeros(n, dtype=np.int64)
+            for node in range(n):  # children always come after their parent
+                if not leaf[node]:
+                    depth[lc[node]] = depth[rc[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+            offset += n
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value).astype(np.float32),
+            roots=np.array(roots, dtype=np.int32),
+            tree_class=np.array(gbtree['tree_info'], dtype=np.int32),
+            base_margin=base_margin,
+            max_depth=max_depth,
+            feature_names=booster.feature_names or []
+        )
+
+    def save(self, path):
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 default_left=self.default_left, value=self.value, roots=self.roots, tree_class=self.tree_class,
+                 base_margin=self.base_margin, max_depth=self.max_depth, feature_names=np.array(self.feature_names),
+                 source_digest=self.source_digest)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+    def predict_proba(self, X):
+        """(n, n_classes) class probabilities; X is a DataFrame in feature_names order or a 2-D array"""
+        if hasattr(X, 'columns') and self.feature_names:
+            X = X[self.feature_names]
+        X = np.ascontiguousarray(X, dtype=np.float32)  # XGBoost compares splits in float32
+        n, n_features = X.shape
+        flat_X = X.ravel()
+        row_offset = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+
+        node = np.broadcast_to(self.roots.astype(np.int64), (n, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = np.take(flat_X, row_offset + np.take(self.feature, node))
+            go_left = x < np.take(self.threshold, node)
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, np.take(self.default_left, node), go_left)
+            node = np.take(self._children, 2 * node + go_left)
+
+        margin = np.take(self.value, node).astype(np.float64) @ self._class_matrix + self.base_margin
+        margin -= margin.max(axis=1, keepdims=True)
+        probs = np.exp(margin)
+        return probs / probs.sum(axis=1, keepdims=True)
@@ -0,0 +1,101 @@
+# upload_manifest.py
+# What predict_upcoming last uploaded for each scheduled fixture: a hash of
+# the prediction's inputs (team form, model, fixture date) and a hash of the
+# row it wrote. Fixtures whose inputs are unchanged are neither re-predicted
+# nor re-uploaded, and a fresh prediction equal to the stored row is not
+# written again.
+
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_FILE = os.getenv("UPLOAD_MANIFEST", '../data/upload_manifest.json')
+# Bump when the hashed inputs change meaning, so every fixture is uploaded once more
+MANIFEST_VERSION = 1
+
+
+def digest(value):
+    """Short content hash of any JSON-serializable value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+_file_digests = {}  # path -> ((mtime_ns, size), digest)
+
+
+def file_digest(path):
+    """Content hash of a file (None if it doesn't exist); rehashed only when its mtime or size changes"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _file_digests.get(path)
+    if cached is None or cached[0] != stamp:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        cached = _file_digests[path] = (stamp, h.hexdigest()[:16])
+    return cached[1]
+
+
+class UploadManifest:
+    """{competition: {"home|away|date": [inputs hash, row hash]}}, saved as JSON at `path`"""
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data['fixtures']
+        except (FileNotFoundError, ValueError, KeyError):
+            pass  # no (usable) manifest: everything counts as changed
+
+    @staticmethod
+    def key(home_team, away_team, date):
+        return f"{home_team}|{away_team}|{date}"
+
+    def inputs_unchanged(self, competition, key, inputs):
+        with self.lock:
+            entry = self.entries.get(competition, {}).get(key)
+        return entry is not None and entry[0] == inputs
+
+    def row_unchanged(self, competition, key, row):
+        with self.lock:
+            entry = self.entries.get(competition, {}).get(key)
+        return entry is not None and entry[1] == row
+
+    def record(self, competition, key, inputs, row):
+        with self.lock:
+            self.entries.setdefault(competition, {})[key] = [inputs, row]
+
+    def prune(self, competition, keys):
+        """Forget fixtures that are no longer scheduled (played or moved)"""
+        with self.lock:
+            fixtures = self.entries.get(competition, {})
+            for key in set(fixtures) - set(keys):
+                del fixtures[key]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with self.lock, open(tmp, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'fixtures': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest():
+    """Process-wide manifest, loaded on first use"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = UploadManifest()
+        return _manifest